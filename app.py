@@ -7,22 +7,33 @@ Winamax (Selenium) + Oddsportal (Selenium) = value bets.
 import sys
 import os
 import time
+import queue
 import threading
+from collections import Counter, deque
 
 # Forcer stdout unbuffered (sinon les prints des threads n'apparaissent pas)
 os.environ["PYTHONUNBUFFERED"] = "1"
 if hasattr(sys.stdout, "reconfigure"):
     sys.stdout.reconfigure(line_buffering=True)
 
+import bisect
 import csv
-import io
-from flask import Flask, render_template, jsonify, request, Response
-
-from config import FLASK_HOST, FLASK_PORT, FLASK_DEBUG, MIN_EV_THRESHOLD, CACHE_DURATION
-from scraper import get_all_events, get_sports, WINAMAX_SPORTS, get_match_result
+import operator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import orjson
+from flask import Flask, render_template, jsonify, request, Response, stream_with_context
+
+from config import (
+    FLASK_HOST, FLASK_PORT, FLASK_DEBUG, MIN_EV_THRESHOLD, CACHE_DURATION,
+    ODDSPORTAL_WORKERS, SCRAPE_CACHE_TTL,
+)
+from scraper import get_all_events, get_sports, WINAMAX_SPORTS, get_match_result, _group_by_sport
 from odds_api import get_reference_odds, get_available_sports, ODDSPORTAL_URLS
 from ev_calculator import find_value_bets
-from bankroll import place_bets, settle_bets, get_bankroll_summary, reset_bankroll, settle_bet_manually
+from bankroll import (
+    place_bets, settle_bets, get_bankroll_summary, reset_bankroll,
+    settle_bet_manually, format_report,
+)
 
 app = Flask(__name__)
 
@@ -30,27 +41,122 @@ app = Flask(__name__)
 
 _cache = {
     "value_bets": [],
+    "bets_by_sport": {},
     "winamax_events": [],
     "last_update": 0,
     "status": "idle",
     "error": None,
     "stats": {},
-    "logs": [],
+    "logs": deque(maxlen=30),
     "progress": 0,
 }
+# _cache n'est jamais modifie en place : les ecrivains publient un nouveau
+# dict (copie + swap de la reference, atomique sous le GIL). Les routes
+# lisent un snapshot coherent sans prendre _lock, qui ne sert qu'a
+# serialiser les read-modify-write des ecrivains.
+# Seule exception : "logs", un deque borne ou _log ajoute en place.
 _lock = threading.Lock()
 
 
+def _update_cache(**changes):
+    """Publie un nouveau snapshot du cache avec les cles modifiees."""
+    global _cache
+    with _lock:
+        _cache = {**_cache, **changes}
+
+
+def _set_progress(progress):
+    """
+    Publie la progression sans prendre _lock : pendant status == "loading",
+    le thread de refresh est le seul ecrivain du cache, le swap suffit.
+    """
+    global _cache
+    _cache = {**_cache, "progress": progress}
+
+
 def _log(msg):
     """Ajoute un message au log visible sur le dashboard."""
-    with _lock:
-        _cache["logs"].append({"time": time.time(), "msg": msg})
-        # Garder les 30 derniers logs
-        if len(_cache["logs"]) > 30:
-            _cache["logs"] = _cache["logs"][-30:]
+    # deque(maxlen=30) : garde les 30 derniers logs, append atomique
+    _cache["logs"].append({"time": time.time(), "msg": msg})
     print(f"[app] {msg}")
 
 
+# ── Cache disque des scrapes ──
+# Les resultats Winamax / Oddsportal sont persistes pour qu'un refresh manuel
+# ou un redemarrage dans la fenetre SCRAPE_CACHE_TTL ne relance pas Selenium.
+# Un fichier par cle : chaque scrape ne reecrit que sa propre entree, sans
+# verrou global pendant l'I/O (les workers Oddsportal ne s'attendent pas).
+
+SCRAPE_CACHE_DIR = os.path.join(os.path.dirname(__file__), "scrape_cache")
+_scrape_cache = {}  # cle -> {"ts", "data"} ; le disque n'est lu qu'au premier acces
+_scrape_cache_lock = threading.Lock()
+_scrape_key_locks = {}
+
+
+def _scrape_cache_path(key):
+    return os.path.join(SCRAPE_CACHE_DIR, key.replace(":", "_") + ".json")
+
+
+def _load_scrape_entry(key):
+    """Charge l'entree d'une cle depuis le disque (None si absente ou illisible)."""
+    try:
+        with open(_scrape_cache_path(key), "rb") as f:
+            return orjson.loads(f.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"[app] Cache de scrapes illisible pour {key}, ignore: {e}")
+        return None
+
+
+def _save_scrape_entry(key, entry):
+    """Sauvegarde atomique d'une entree (appele avec le verrou de la cle tenu)."""
+    os.makedirs(SCRAPE_CACHE_DIR, exist_ok=True)
+    path = _scrape_cache_path(key)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(orjson.dumps(entry, option=orjson.OPT_NON_STR_KEYS))
+    os.replace(tmp, path)
+
+
+def _cached_scrape(key, fn, *args, cache_if=bool, **kwargs):
+    """
+    Memoise fn(*args, **kwargs) sur disque pendant SCRAPE_CACHE_TTL.
+    Un verrou par cle evite que deux refresh concurrents scrapent la meme chose.
+    Les resultats vides (echec de scraping, cache_if(data) faux) ne sont
+    pas mis en cache.
+    """
+    with _scrape_cache_lock:
+        key_lock = _scrape_key_locks.setdefault(key, threading.Lock())
+
+    with key_lock:
+        if key not in _scrape_cache:
+            _scrape_cache[key] = _load_scrape_entry(key)
+        entry = _scrape_cache[key]
+        if entry and time.time() - entry["ts"] < SCRAPE_CACHE_TTL:
+            print(f"[app] Cache disque utilise pour {key}")
+            return entry["data"]
+
+        data = fn(*args, **kwargs)
+        if cache_if(data):
+            entry = {"ts": time.time(), "data": data}
+            _scrape_cache[key] = entry
+            try:
+                _save_scrape_entry(key, entry)
+            except OSError as e:
+                print(f"[app] Erreur sauvegarde cache de scrapes: {e}")
+        return data
+
+
+def _sport_label(sport_key, events):
+    """Nom lisible d'un sport (Oddsportal, sinon libelle Winamax)."""
+    if sport_key in ODDSPORTAL_URLS:
+        return ODDSPORTAL_URLS[sport_key][0]
+    for wm in events[:1]:
+        return wm.get("sport", sport_key)
+    return sport_key
+
+
 def _refresh_data():
     """Rafraichit les donnees Winamax + Oddsportal."""
     global _cache
@@ -58,88 +164,97 @@ def _refresh_data():
     with _lock:
         if _cache["status"] == "loading":
             return
-        _cache["status"] = "loading"
-        _cache["error"] = None
-        _cache["logs"] = []
-        _cache["progress"] = 0
+        _cache = {**_cache, "status": "loading", "error": None,
+                  "logs": deque(maxlen=30), "progress": 0}
 
     try:
         # 1. Scraper Winamax
         _log("Demarrage Chrome headless...")
         _log("Scraping des cotes Winamax...")
 
-        with _lock:
-            _cache["progress"] = 10
+        _set_progress(10)
 
-        wm_events = get_all_events()
+        # Seule la liste plate est mise en cache ; l'index par sport (memes
+        # objets) est reconstruit en une passe
+        wm_events = _cached_scrape("winamax:events", lambda: get_all_events()[0])
+        sports_map = _group_by_sport(wm_events)
         _log(f"{len(wm_events)} evenements Winamax recuperes")
 
-        with _lock:
-            _cache["progress"] = 25
+        _set_progress(25)
 
         # 2. Scraper Oddsportal (reference multi-books)
         _log("Scraping Oddsportal (cotes de reference)...")
         all_value_bets = []
 
-        # Regrouper les events Winamax par sport
-        sports_map = {}
-        for ev in wm_events:
-            key = ev.get("sport_api_key", "")
-            if key:
-                sports_map.setdefault(key, []).append(ev)
-
         sport_keys = list(sports_map.keys())
         total_sports = len(sport_keys)
 
-        for idx, sport_key in enumerate(sport_keys):
-            events = sports_map[sport_key]
-            sport_label = sport_key
-            # Trouver le nom lisible
-            if sport_key in ODDSPORTAL_URLS:
-                sport_label = ODDSPORTAL_URLS[sport_key][0]
-            else:
-                for wm in events[:1]:
-                    sport_label = wm.get("sport", sport_key)
-
-            _log(f"Comparaison {sport_label} ({len(events)} matchs Winamax)...")
-
-            with _lock:
-                _cache["progress"] = 25 + int(60 * (idx / max(total_sports, 1)))
-
-            # Note: O/U et BTTS via match pages Oddsportal ne fonctionnent pas
-            # (navigation SPA + fragment URL #over-under;2 inoperant en headless)
-            # Seul H2H via Betfair/Pinnacle est fiable pour l'instant.
-            markets_param = "h2h"
-            ref_odds = get_reference_odds(sport_key, markets=markets_param)
-            if ref_odds:
-                _log(f"{sport_label}: {len(ref_odds)} matchs de reference trouves")
-                vb = find_value_bets(events, ref_odds, MIN_EV_THRESHOLD)
-                if vb:
-                    all_value_bets.extend(vb)
-                    _log(f"{sport_label}: {len(vb)} value bets detectes!")
+        # Note: O/U et BTTS via match pages Oddsportal ne fonctionnent pas
+        # (navigation SPA + fragment URL #over-under;2 inoperant en headless)
+        # Seul H2H via Betfair/Pinnacle est fiable pour l'instant.
+        markets_param = "h2h"
+
+        # Les sports sont independants : on les scrape en parallele
+        # (I/O Selenium/reseau, le GIL n'est pas un frein)
+        done = 0
+        with ThreadPoolExecutor(max_workers=ODDSPORTAL_WORKERS) as executor:
+            futures = {}
+            for sport_key in sport_keys:
+                events = sports_map[sport_key]
+                _log(f"Comparaison {_sport_label(sport_key, events)} ({len(events)} matchs Winamax)...")
+                future = executor.submit(
+                    _cached_scrape, f"oddsportal:{sport_key}:{markets_param}",
+                    get_reference_odds, sport_key, markets=markets_param,
+                )
+                futures[future] = sport_key
+
+            for future in as_completed(futures):
+                sport_key = futures[future]
+                events = sports_map[sport_key]
+                sport_label = _sport_label(sport_key, events)
+                done += 1
+
+                _set_progress(25 + int(60 * (done / max(total_sports, 1))))
+
+                try:
+                    ref_odds = future.result()
+                except Exception as e:
+                    _log(f"{sport_label}: erreur Oddsportal ({e})")
+                    continue
+
+                if ref_odds:
+                    _log(f"{sport_label}: {len(ref_odds)} matchs de reference trouves")
+                    vb = find_value_bets(events, ref_odds, MIN_EV_THRESHOLD)
+                    if vb:
+                        all_value_bets.extend(vb)
+                        _log(f"{sport_label}: {len(vb)} value bets detectes!")
+                    else:
+                        _log(f"{sport_label}: aucun value bet")
                 else:
-                    _log(f"{sport_label}: aucun value bet")
-            else:
-                _log(f"{sport_label}: pas de donnees Oddsportal")
+                    _log(f"{sport_label}: pas de donnees Oddsportal")
 
-        with _lock:
-            _cache["progress"] = 90
+        _set_progress(90)
 
         # Dedupliquer et trier
         _log("Analyse et tri des resultats...")
-        seen = set()
-        unique_bets = []
+        # setdefault garde la premiere occurrence : un seul hash par pari
+        # (au lieu de `in` + `add`), l'ordre d'insertion est preserve
+        unique = {}
         for vb in all_value_bets:
-            key = f"{vb['home']}_{vb['away']}_{vb['bet_on']}_{vb['market']}"
-            if key not in seen:
-                seen.add(key)
-                unique_bets.append(vb)
+            key = (vb["home"], vb["away"], vb["bet_on"], vb["market"])
+            unique.setdefault(key, vb)
+        unique_bets = list(unique.values())
         unique_bets.sort(key=lambda x: x["ev_percent"], reverse=True)
 
+        # Index par sport (minuscule) construit une fois par refresh :
+        # le filtre sport de /api/valuebets devient une simple lecture de dict
+        bets_by_sport = {}
+        for vb in unique_bets:
+            bets_by_sport.setdefault(vb["sport"].lower(), []).append(vb)
+
         # 3. Bankroll: settlement des paris existants
         _log("Verification des paris en attente...")
-        with _lock:
-            _cache["progress"] = 92
+        _set_progress(92)
         try:
             settle_result = settle_bets(get_match_result)
             if settle_result["settled"] > 0:
@@ -151,8 +266,7 @@ def _refresh_data():
 
         # 4. Bankroll: placement des nouveaux paris (Kelly)
         _log("Placement des nouveaux paris (Kelly)...")
-        with _lock:
-            _cache["progress"] = 95
+        _set_progress(95)
         try:
             place_result = place_bets(unique_bets)
             if place_result["placed"] > 0:
@@ -162,29 +276,32 @@ def _refresh_data():
         except Exception as e:
             _log(f"Erreur placement: {e}")
 
-        # Stats
-        sports_count = {}
+        # Stats (un seul passage pour le comptage par sport et la somme des EV)
+        sports_count = Counter()
+        total_ev = 0.0
         for vb in unique_bets:
-            s = vb.get("sport", "?")
-            sports_count[s] = sports_count.get(s, 0) + 1
+            sports_count[vb.get("sport", "?")] += 1
+            total_ev += vb["ev_percent"]
 
         avg_ev = 0
         if unique_bets:
-            avg_ev = round(sum(v["ev_percent"] for v in unique_bets) / len(unique_bets), 2)
-
-        with _lock:
-            _cache["value_bets"] = unique_bets
-            _cache["winamax_events"] = wm_events
-            _cache["last_update"] = time.time()
-            _cache["status"] = "ready"
-            _cache["progress"] = 100
-            _cache["stats"] = {
+            avg_ev = round(total_ev / len(unique_bets), 2)
+
+        _update_cache(
+            value_bets=unique_bets,
+            bets_by_sport=bets_by_sport,
+            winamax_events=wm_events,
+            last_update=time.time(),
+            status="ready",
+            progress=100,
+            stats={
                 "total_bets": len(unique_bets),
                 "total_events": len(wm_events),
                 "avg_ev": avg_ev,
-                "by_sport": sports_count,
-                "top_sport": max(sports_count, key=sports_count.get) if sports_count else "-",
-            }
+                "by_sport": dict(sports_count),
+                "top_sport": sports_count.most_common(1)[0][0] if sports_count else "-",
+            },
+        )
 
         _log(f"Termine : {len(unique_bets)} value bets trouves!")
 
@@ -192,75 +309,141 @@ def _refresh_data():
         _log(f"Erreur : {e}")
         import traceback
         traceback.print_exc()
-        with _lock:
-            _cache["status"] = "error"
-            _cache["error"] = str(e)
-            _cache["progress"] = 0
+        _update_cache(status="error", error=str(e), progress=0)
+
+
+# ── Worker de refresh ──
+# Un thread unique consomme les demandes ; la file de taille 1 fusionne
+# les demandes rapprochees au lieu de lancer un thread par requete.
+
+_refresh_trigger = queue.Queue(maxsize=1)
+
+
+def _refresh_worker():
+    """Boucle du worker : execute un refresh par demande recue."""
+    while True:
+        _refresh_trigger.get()
+        _refresh_data()
+
+
+def _request_refresh():
+    """Demande un refresh au worker. Retourne False si une demande est deja en file."""
+    try:
+        _refresh_trigger.put_nowait(True)
+        return True
+    except queue.Full:
+        return False
+
+
+threading.Thread(target=_refresh_worker, daemon=True).start()
 
 
 # ── Routes Flask ──
 
+def _json_response(payload):
+    """Reponse JSON serialisee par orjson (plus rapide que jsonify sur les gros payloads)."""
+    return Response(
+        orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS),
+        mimetype="application/json",
+    )
+
+
 @app.route("/")
 def dashboard():
     return render_template("dashboard.html")
 
 
+# Listes de paris deja serialisees, par filtre : le dashboard repoll avec les
+# memes parametres, on evite de refiltrer et reserialiser. La cle inclut
+# last_update (les paris ne changent qu'a la fin d'un refresh) ; le cache est
+# vide quand il atteint sa taille max (filtres arbitraires cote client).
+_bets_json_cache = {}
+_BETS_JSON_CACHE_MAX = 64
+
+
+def _filtered_bets_json(snap, sport, min_ev, min_odds, max_odds):
+    """Retourne la liste filtree des value bets, pre-serialisee (bytes JSON)."""
+    key = (snap["last_update"], sport.lower(), min_ev, min_odds, max_odds)
+    cached = _bets_json_cache.get(key)
+    if cached is not None:
+        return cached
+
+    if sport:
+        bets = snap["bets_by_sport"].get(sport.lower(), [])
+    else:
+        bets = snap["value_bets"]
+
+    # Les listes sont triees par EV decroissante : min_ev se resout par
+    # bisection (O(log n)) au lieu d'un parcours complet
+    if min_ev > 0:
+        bets = bets[:bisect.bisect_right(bets, -min_ev, key=lambda b: -b["ev_percent"])]
+
+    # Un seul passage pour les bornes de cote (borne haute neutre si non demandee)
+    if min_odds > 0 or max_odds < 999:
+        hi_odds = max_odds if max_odds < 999 else float("inf")
+        bets = [b for b in bets if min_odds <= b["winamax_odds"] <= hi_odds]
+
+    cached = orjson.dumps(bets, option=orjson.OPT_NON_STR_KEYS)
+    if len(_bets_json_cache) >= _BETS_JSON_CACHE_MAX:
+        _bets_json_cache.clear()
+    _bets_json_cache[key] = cached
+    return cached
+
+
 @app.route("/api/valuebets")
 def api_valuebets():
+    snap = _cache
     now = time.time()
-    if now - _cache["last_update"] > CACHE_DURATION and _cache["status"] != "loading":
-        thread = threading.Thread(target=_refresh_data, daemon=True)
-        thread.start()
+    if now - snap["last_update"] > CACHE_DURATION and snap["status"] != "loading":
+        _request_refresh()
 
     sport = request.args.get("sport", "")
     min_ev = float(request.args.get("min_ev", 0))
     min_odds = float(request.args.get("min_odds", 0))
     max_odds = float(request.args.get("max_odds", 999))
 
-    bets = _cache["value_bets"]
-    if sport:
-        bets = [b for b in bets if b["sport"].lower() == sport.lower()]
-    if min_ev > 0:
-        bets = [b for b in bets if b["ev_percent"] >= min_ev]
-    if min_odds > 0:
-        bets = [b for b in bets if b["winamax_odds"] >= min_odds]
-    if max_odds < 999:
-        bets = [b for b in bets if b["winamax_odds"] <= max_odds]
-
-    return jsonify({
-        "bets": bets,
-        "status": _cache["status"],
-        "last_update": _cache["last_update"],
-        "error": _cache["error"],
-        "stats": _cache["stats"],
-        "logs": _cache["logs"],
-        "progress": _cache["progress"],
-    })
+    bets_json = _filtered_bets_json(snap, sport, min_ev, min_odds, max_odds)
+    rest = orjson.dumps({
+        "status": snap["status"],
+        "last_update": snap["last_update"],
+        "error": snap["error"],
+        "stats": snap["stats"],
+        "logs": list(snap["logs"]),
+        "progress": snap["progress"],
+    }, option=orjson.OPT_NON_STR_KEYS)
+    # Liste deja serialisee inseree telle quelle en tete de l'objet
+    # (orjson.Fragment n'existe qu'a partir d'orjson 3.9)
+    return Response(b'{"bets":' + bets_json + b"," + rest[1:], mimetype="application/json")
 
 
 @app.route("/api/refresh", methods=["POST"])
 def api_refresh():
     if _cache["status"] == "loading":
         return jsonify({"message": "Refresh deja en cours"}), 429
-    thread = threading.Thread(target=_refresh_data, daemon=True)
-    thread.start()
+    if not _request_refresh():
+        return jsonify({"message": "Refresh deja demande"}), 429
     return jsonify({"message": "Refresh lance"})
 
 
+# Liste statique (derivee de WINAMAX_SPORTS, sans scraping) : calculee une fois
+_SPORTS = get_sports()
+
+
 @app.route("/api/sports")
 def api_sports():
-    return jsonify({"sports": get_sports()})
+    return jsonify({"sports": _SPORTS})
 
 
 @app.route("/api/status")
 def api_status():
-    return jsonify({
-        "status": _cache["status"],
-        "last_update": _cache["last_update"],
-        "error": _cache["error"],
-        "stats": _cache["stats"],
-        "logs": _cache["logs"],
-        "progress": _cache["progress"],
+    snap = _cache
+    return _json_response({
+        "status": snap["status"],
+        "last_update": snap["last_update"],
+        "error": snap["error"],
+        "stats": snap["stats"],
+        "logs": list(snap["logs"]),
+        "progress": snap["progress"],
     })
 
 
@@ -268,12 +451,13 @@ def api_status():
 
 @app.route("/api/bankroll")
 def api_bankroll():
-    return jsonify(get_bankroll_summary())
+    return _json_response(get_bankroll_summary())
 
 
 @app.route("/api/bankroll/settle", methods=["POST"])
 def api_bankroll_settle():
     result = settle_bets(get_match_result, force=True)
+    result["bet_reports"] = [format_report(r) for r in result["bet_reports"]]
     return jsonify(result)
 
 
@@ -290,60 +474,82 @@ def api_bankroll_settle_manual():
 
 @app.route("/api/bankroll/reset", methods=["POST"])
 def api_bankroll_reset():
-    amount = 100.0
-    if request.is_json and request.json.get("amount"):
-        amount = float(request.json["amount"])
+    body = request.get_json(silent=True) or {}
+    amount = float(body.get("amount") or 100.0)
     summary = reset_bankroll(amount)
     return jsonify({"message": "Bankroll reinitialisee", "summary": summary})
 
 
-@app.route("/api/bankroll/export")
-def api_bankroll_export():
-    data = get_bankroll_summary()
-    bets = data.get("recent_bets", [])
+_EXPORT_FIELDS = operator.itemgetter(
+    "placed_at", "sport", "home", "away", "bet_on", "market", "winamax_odds",
+    "fair_prob", "ev_percent", "stake", "potential_return", "status", "profit",
+    "kelly_fraction", "match_id",
+)
+_STATUS_LABELS = {"pending": "En attente", "won": "Gagne", "lost": "Perdu", "void": "Void"}
+
+
+_fmt1 = "{:.1f}".format
+_fmt2 = "{:.2f}".format
+_fmt6 = "{:.6f}".format
+
+
+def _export_rows(bets):
+    """Genere les lignes CSV du ledger (un seul itemgetter par pari)."""
+    strftime, localtime = time.strftime, time.localtime
+    status_label = _STATUS_LABELS.get
+
+    for (placed_at, sport, home, away, bet_on, market, odds, fair_prob, ev,
+         stake, potential_return, status, profit, kelly, match_id) in map(_EXPORT_FIELDS, bets):
+        yield (
+            strftime("%d/%m/%Y %H:%M", localtime(placed_at)), sport,
+            f"{home} vs {away}", bet_on, market, _fmt2(odds),
+            _fmt1(fair_prob), _fmt2(ev),
+            _fmt2(stake), _fmt2(potential_return),
+            status_label(status, status),
+            _fmt2(profit) if profit is not None else "",
+            _fmt6(kelly), match_id,
+        )
+
+
+class _EchoBuffer:
+    """Pseudo-fichier pour csv.writer : write() renvoie la ligne au lieu de la stocker."""
 
-    buf = io.StringIO()
-    buf.write('\ufeff')  # BOM for Excel UTF-8
-    writer = csv.writer(buf, delimiter=';')
-    writer.writerow([
+    def write(self, value):
+        return value
+
+
+def _generate_export_csv(data):
+    """Genere le CSV du ledger ligne par ligne (memoire constante)."""
+    writer = csv.writer(_EchoBuffer(), delimiter=';')
+
+    yield '\ufeff'  # BOM for Excel UTF-8
+    yield writer.writerow([
         "Date", "Sport", "Match", "Pari", "Marche", "Cote Winamax",
         "Prob Reelle %", "EV %", "Mise EUR", "Retour Potentiel EUR",
         "Statut", "Profit EUR", "Kelly Fraction", "Match ID"
     ])
 
-    from datetime import datetime
-    for b in bets:
-        dt = datetime.fromtimestamp(b.get("placed_at", 0)).strftime("%d/%m/%Y %H:%M")
-        match = f"{b.get('home', '')} vs {b.get('away', '')}"
-        status_map = {"pending": "En attente", "won": "Gagne", "lost": "Perdu", "void": "Void"}
-        status = status_map.get(b.get("status", ""), b.get("status", ""))
-        profit = b.get("profit")
-        profit_str = f"{profit:.2f}" if profit is not None else ""
-
-        writer.writerow([
-            dt, b.get("sport", ""), match, b.get("bet_on", ""),
-            b.get("market", ""), f"{b.get('winamax_odds', 0):.2f}",
-            f"{b.get('fair_prob', 0):.1f}", f"{b.get('ev_percent', 0):.2f}",
-            f"{b.get('stake', 0):.2f}", f"{b.get('potential_return', 0):.2f}",
-            status, profit_str,
-            f"{b.get('kelly_fraction', 0):.6f}", b.get("match_id", "")
-        ])
+    for row in _export_rows(data.get("recent_bets", [])):
+        yield writer.writerow(row)
 
     # Summary row
-    writer.writerow([])
-    writer.writerow(["RESUME"])
-    writer.writerow(["Bankroll initiale", f"{data.get('initial_bankroll', 100):.2f} EUR"])
-    writer.writerow(["Bankroll actuelle", f"{data.get('current_bankroll', 0):.2f} EUR"])
-    writer.writerow(["Total mise", f"{data.get('total_staked', 0):.2f} EUR"])
-    writer.writerow(["Profit total", f"{data.get('total_profit', 0):.2f} EUR"])
-    writer.writerow(["ROI", f"{data.get('roi', 0):.1f}%"])
-    writer.writerow(["Win Rate", f"{data.get('win_rate', 0):.1f}%"])
-    writer.writerow(["Paris total", data.get("total_bets", 0)])
-    writer.writerow(["En attente", data.get("pending_bets", 0)])
-
-    output = buf.getvalue()
+    yield writer.writerow([])
+    yield writer.writerow(["RESUME"])
+    yield writer.writerow(["Bankroll initiale", f"{data.get('initial_bankroll', 100):.2f} EUR"])
+    yield writer.writerow(["Bankroll actuelle", f"{data.get('current_bankroll', 0):.2f} EUR"])
+    yield writer.writerow(["Total mise", f"{data.get('total_staked', 0):.2f} EUR"])
+    yield writer.writerow(["Profit total", f"{data.get('total_profit', 0):.2f} EUR"])
+    yield writer.writerow(["ROI", f"{data.get('roi', 0):.1f}%"])
+    yield writer.writerow(["Win Rate", f"{data.get('win_rate', 0):.1f}%"])
+    yield writer.writerow(["Paris total", data.get("total_bets", 0)])
+    yield writer.writerow(["En attente", data.get("pending_bets", 0)])
+
+
+@app.route("/api/bankroll/export")
+def api_bankroll_export():
+    data = get_bankroll_summary()
     return Response(
-        output,
+        stream_with_context(_generate_export_csv(data)),
         mimetype="text/csv",
         headers={"Content-Disposition": "attachment; filename=ev_finder_ledger.csv"}
     )
@@ -358,7 +564,7 @@ if __name__ == "__main__":
     print("=" * 50)
 
     print("\n[*] Premier chargement des donnees...")
-    threading.Thread(target=_refresh_data, daemon=True).start()
+    _request_refresh()
 
     print(f"[*] Dashboard : http://localhost:{FLASK_PORT}")
     print()
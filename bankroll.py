@@ -1,91 +1,486 @@
 """
 Bankroll Manager — Livre de compte virtuel.
 Gestion du bankroll, sizing Kelly, placement et suivi des paris.
-Persistence dans bankroll.json.
+Persistence dans bankroll.json (snapshot) + bankroll.log (journal des
+mutations, une ligne JSON par placement / reglement).
 """
 
-import json
+import atexit
+import bisect
+import gzip
 import os
+import re
+import shutil
 import time
 import uuid
 import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from itertools import accumulate
+
+import orjson
 
 from config import (
     BANKROLL_INITIAL, KELLY_FRACTION, MAX_STAKE_PERCENT,
     MIN_STAKE, MIN_EV_TO_BET, MIN_BOOKS_TO_BET, AUTO_BET,
 )
+from ev_calculator import _normalize_name
 
 BANKROLL_FILE = os.path.join(os.path.dirname(__file__), "bankroll.json")
-_lock = threading.Lock()
+JOURNAL_FILE = os.path.join(os.path.dirname(__file__), "bankroll.log")
+# Au-dela de cette taille, le journal est compacte dans un nouveau snapshot
+JOURNAL_MAX_BYTES = 1024 * 1024
+# Paris regles depuis plus de ARCHIVE_AFTER_DAYS jours : sortis du snapshot
+# (vers l'archive gzip) lors d'une compaction, des que bets depasse ARCHIVE_MIN_BETS
+ARCHIVE_FILE = os.path.join(os.path.dirname(__file__), "bankroll_archive.jsonl.gz")
+ARCHIVE_AFTER_DAYS = 90
+ARCHIVE_MIN_BETS = 10_000
+
+# Montants stockes en centimes (int) : additions exactes, sans round().
+# Conversion en EUR uniquement a la sortie (_summarize, _bet_view).
+_TOTAL_FIELDS = ("initial_bankroll", "current_bankroll", "total_staked", "total_returned")
+_BET_MONEY_FIELDS = ("stake", "potential_return", "profit")
+
+# Soldes recopies dans chaque entree du journal (valeurs absolues : rejouer
+# deux fois la meme entree ne change rien)
+_BALANCE_FIELDS = ("current_bankroll", "total_staked", "total_returned")
+
+
+class _RWLock:
+    """
+    Verrou lecteurs / ecrivain : les lectures (resume du dashboard) sont
+    concurrentes, les ecritures (placement, reglement, reset) exclusives.
+    Un ecrivain en attente bloque les nouveaux lecteurs (pas de famine).
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+_lock = _RWLock()
+
+# Bankroll en memoire : lu une seule fois depuis le disque (snapshot + journal).
+# _dirty : le snapshot est en retard sur le journal.
+_cache = None
+_dirty = False
+_init_lock = threading.Lock()
+
+# Compaction differee : au plus une verification par FLUSH_DELAY secondes
+FLUSH_DELAY = 1.0
+_flush_timer = None
+_timer_lock = threading.Lock()
+# Points du graphique P/L renvoyes au dashboard (les plus recents)
+PL_HISTORY_MAX_POINTS = 1000
+
+# Index des paris, reconstruit avec _cache puis tenu a jour a chaque
+# placement / reglement (voir _build_index)
+_index = None
 
 
 # ── Persistence ──
 
-def _load_bankroll():
-    """Charge le bankroll depuis le disque, ou cree un defaut."""
-    if os.path.exists(BANKROLL_FILE):
-        with open(BANKROLL_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
+def _to_cents(amount):
+    return int(round(amount * 100))
+
+
+def _from_cents(cents):
+    return cents / 100
+
+
+def _new_bankroll(amount):
+    """Bankroll vierge de `amount` EUR."""
+    now = int(time.time())
     return {
-        "initial_bankroll": BANKROLL_INITIAL,
-        "current_bankroll": BANKROLL_INITIAL,
-        "total_staked": 0.0,
-        "total_returned": 0.0,
-        "created_at": int(time.time()),
-        "last_updated": int(time.time()),
+        "money_unit": "cents",
+        "initial_bankroll": _to_cents(amount),
+        "current_bankroll": _to_cents(amount),
+        "total_staked": 0,
+        "total_returned": 0,
+        "created_at": now,
+        "last_updated": now,
         "bets": [],
     }
 
 
-def _save_bankroll(data):
-    """Sauvegarde atomique du bankroll sur disque."""
-    data["last_updated"] = int(time.time())
-    tmp = BANKROLL_FILE + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-    os.replace(tmp, BANKROLL_FILE)
+def _read_bankroll_file():
+    """Lit le bankroll depuis le disque, ou cree un defaut."""
+    if os.path.exists(BANKROLL_FILE):
+        with open(BANKROLL_FILE, "rb") as f:
+            return orjson.loads(f.read())
+    return _new_bankroll(BANKROLL_INITIAL)
 
 
-# ── Kelly Criterion ──
+def _bet_view(bet):
+    """Copie d'un pari avec ses montants en EUR (pour l'API / le CSV)."""
+    view = dict(bet)
+    for field in _BET_MONEY_FIELDS:
+        if view.get(field) is not None:
+            view[field] = _from_cents(view[field])
+    return view
 
-def calculate_kelly_stake(odds, fair_prob_pct, bankroll):
+
+def _migrate_to_cents(data):
+    """
+    Convertit un bankroll en EUR (ancien format) en centimes.
+    Retourne True si une migration a eu lieu.
     """
-    Calcule la mise optimale avec le critere de Kelly fractionnaire.
+    if data.get("money_unit") == "cents":
+        return False
+    for field in _TOTAL_FIELDS:
+        data[field] = _to_cents(data.get(field) or 0)
+    for bet in data["bets"]:
+        for field in _BET_MONEY_FIELDS:
+            if bet.get(field) is not None:
+                bet[field] = _to_cents(bet[field])
+    data["money_unit"] = "cents"
+    return True
 
-    Args:
-        odds: Cote decimale (ex: 1.85)
-        fair_prob_pct: Probabilite reelle en % (ex: 58.2)
-        bankroll: Bankroll actuel en EUR
 
-    Returns:
-        dict avec kelly_full, kelly_fraction, stake, kelly_used
+def _load_bankroll():
+    """
+    Retourne le bankroll en memoire (charge depuis le disque au premier appel).
+    Double verification : une fois le cache chaud, aucun verrou n'est pris ;
+    _init_lock n'est dispute qu'au demarrage, si plusieurs lecteurs arrivent
+    en meme temps.
+    """
+    global _cache, _index
+    if _cache is None:
+        with _init_lock:
+            if _cache is None:
+                data = _read_bankroll_file()
+                _replay_journal(data)
+                if _migrate_to_cents(data):
+                    # Snapshot immediat : le journal ne melange jamais les unites
+                    _save_bankroll(data)
+                _index = _build_index(data)
+                _cache = data  # publie en dernier : _index est deja pret
+    return _cache
+
+
+def _append_event(kind, payload, data):
+    """
+    Ajoute une mutation au journal (une ligne JSON, fsync) : cout constant
+    quel que soit l'historique, au lieu de reecrire tout bankroll.json.
     """
-    p = fair_prob_pct / 100.0
-    q = 1.0 - p
-    b = odds - 1.0
+    event = {"t": int(time.time()), "kind": kind, **payload}
+    for field in _BALANCE_FIELDS:
+        event[field] = data[field]
+    with open(JOURNAL_FILE, "ab") as f:
+        f.write(orjson.dumps(event) + b"\n")
+        f.flush()
+        os.fsync(f.fileno())
 
-    if b <= 0 or p <= 0:
-        return {"kelly_full": 0, "kelly_fraction": 0, "stake": 0, "kelly_used": KELLY_FRACTION}
 
-    # Kelly: f = (bp - q) / b
-    kelly_full = (b * p - q) / b
+def _settle_payload(bet):
+    return {
+        "bet_id": bet["bet_id"],
+        "status": bet["status"],
+        "profit": bet["profit"],
+        "settled_at": bet["settled_at"],
+        "result_info": bet["result_info"],
+    }
+
+
+def _replay_journal(data):
+    """
+    Rejoue le journal sur le snapshot charge. Idempotent : un pari deja
+    present n'est pas ajoute deux fois (crash entre snapshot et troncature).
+    """
+    global _dirty
+    if not os.path.exists(JOURNAL_FILE):
+        return
+    by_id = {b["bet_id"]: b for b in data["bets"]}
+    replayed = 0
+    with open(JOURNAL_FILE, "rb") as f:
+        for line in f:
+            try:
+                event = orjson.loads(line)
+            except ValueError:
+                # Derniere ligne tronquee par un arret brutal
+                print("[bankroll] Entree de journal illisible ignoree")
+                break
+            if event["kind"] == "place":
+                bet = event["bet"]
+                if bet["bet_id"] not in by_id:
+                    data["bets"].append(bet)
+                    by_id[bet["bet_id"]] = bet
+            elif event["kind"] == "settle":
+                bet = by_id.get(event["bet_id"])
+                if bet is not None:
+                    for field in ("status", "profit", "settled_at", "result_info"):
+                        bet[field] = event[field]
+            for field in _BALANCE_FIELDS:
+                data[field] = event[field]
+            replayed += 1
+    if replayed:
+        _dirty = True
+
 
-    if kelly_full <= 0:
-        return {"kelly_full": 0, "kelly_fraction": 0, "stake": 0, "kelly_used": KELLY_FRACTION}
+# ── Index des paris ──
 
-    # Quarter Kelly + cap
-    kelly_frac = min(kelly_full * KELLY_FRACTION, MAX_STAKE_PERCENT)
-    stake = round(bankroll * kelly_frac, 2)
+def _dedup_key(bet):
+    """Cle de deduplication d'un pari : (match_id, bet_on, market)."""
+    return (bet.get("match_id", ""), bet["bet_on"], bet["market"])
 
-    if stake < MIN_STAKE:
-        stake = 0
 
+def _settled_at(bet):
+    return bet.get("settled_at", 0)
+
+
+def _start_time(bet):
+    return bet.get("start_time", 0)
+
+
+def _pl_point(bet, cumulative, initial):
+    """Point du graphique P/L apres le reglement de `bet` (montants en EUR)."""
     return {
-        "kelly_full": round(kelly_full, 6),
-        "kelly_fraction": round(kelly_frac, 6),
-        "stake": stake,
-        "kelly_used": KELLY_FRACTION,
+        "timestamp": bet.get("settled_at", 0),
+        "cumulative_pl": _from_cents(cumulative),
+        "bankroll": _from_cents(initial + cumulative),
+        "bet_id": bet["bet_id"],
+    }
+
+
+def _build_pl_history(settled_sorted, initial, cumulative=0):
+    # Somme cumulee en C (accumulate) sur des centimes entiers : aucun round()
+    cums = accumulate((b["profit"] or 0 for b in settled_sorted), initial=cumulative)
+    next(cums)  # valeur de depart
+    return [_pl_point(b, c, initial) for b, c in zip(settled_sorted, cums)]
+
+
+def _build_index(data):
+    """
+    Construit l'index des paris et les compteurs du resume :
+      - by_id          : bet_id -> pari (tous statuts)
+      - dedup_keys     : cles de deduplication de tous les paris
+      - pending        : bet_id -> pari en attente (ordre de placement)
+      - pending_by_start : paris en attente tries par start_time
+      - won / lost     : nombre de paris gagnes / perdus (archives compris)
+      - profit, settled_stakes : sommes (centimes) sur les paris gagnes + perdus
+      - settled_sorted : paris gagnes + perdus tries par settled_at
+      - pl_history     : points du graphique P/L, dans l'ordre de settled_sorted
+    """
+    archived = data.get("archived", {})
+    index = {
+        "by_id": {}, "dedup_keys": set(), "pending": {},
+        "won": archived.get("won", 0), "lost": archived.get("lost", 0),
+        "profit": archived.get("profit", 0),
+        "settled_stakes": archived.get("settled_stakes", 0),
+        "archived_bets": archived.get("bets", 0),
+        "archived_profit": archived.get("profit", 0),
+        "initial_bankroll": data["initial_bankroll"],
     }
+    settled = []
+    for bet in data["bets"]:
+        index["by_id"][bet["bet_id"]] = bet
+        index["dedup_keys"].add(_dedup_key(bet))
+        status = bet["status"]
+        if status == "pending":
+            index["pending"][bet["bet_id"]] = bet
+        elif status in ("won", "lost"):
+            index[status] += 1
+            index["profit"] += bet["profit"] or 0
+            index["settled_stakes"] += bet["stake"]
+            settled.append(bet)
+    settled.sort(key=_settled_at)
+    index["settled_sorted"] = settled
+    index["pending_by_start"] = sorted(index["pending"].values(), key=_start_time)
+    index["pl_history"] = _build_pl_history(
+        settled, data["initial_bankroll"], index["archived_profit"])
+    return index
+
+
+def _index_placed(bet):
+    """Ajoute un pari nouvellement place a l'index."""
+    _index["by_id"][bet["bet_id"]] = bet
+    _index["dedup_keys"].add(_dedup_key(bet))
+    _index["pending"][bet["bet_id"]] = bet
+    bisect.insort(_index["pending_by_start"], bet, key=_start_time)
+
+
+def _index_settled(bet):
+    """Met a jour l'index et les compteurs apres le reglement d'un pari en attente."""
+    del _index["pending"][bet["bet_id"]]
+    by_start = _index["pending_by_start"]
+    i = bisect.bisect_left(by_start, _start_time(bet), key=_start_time)
+    while by_start[i] is not bet:
+        i += 1
+    del by_start[i]
+    status = bet["status"]
+    if status not in ("won", "lost"):
+        return
+    _index[status] += 1
+    _index["profit"] += bet["profit"] or 0
+    _index["settled_stakes"] += bet["stake"]
+    settled = _index["settled_sorted"]
+    if not settled or _settled_at(settled[-1]) <= _settled_at(bet):
+        # Cas normal : le pari le plus recemment regle va en fin de courbe
+        settled.append(bet)
+        _index["pl_history"].append(
+            _pl_point(bet, _index["profit"], _index["initial_bankroll"]))
+    else:
+        bisect.insort(settled, bet, key=_settled_at)
+        _index["pl_history"] = _build_pl_history(
+            settled, _index["initial_bankroll"], _index["archived_profit"])
+
+
+def _mark_dirty():
+    """Signale une mutation du bankroll et programme son ecriture differee."""
+    global _dirty
+    _dirty = True
+    _schedule_flush()
+
+
+def _schedule_flush():
+    """
+    Programme flush() dans FLUSH_DELAY secondes si aucun timer n'est en cours :
+    une rafale de mutations (placement de N paris, sweep de reglement)
+    ne produit qu'une seule ecriture.
+    """
+    global _flush_timer
+    with _timer_lock:
+        if _flush_timer is None:
+            _flush_timer = threading.Timer(FLUSH_DELAY, flush)
+            _flush_timer.daemon = True
+            _flush_timer.start()
+
+
+def flush(force=False):
+    """
+    Compacte le journal dans un nouveau snapshot s'il depasse
+    JOURNAL_MAX_BYTES (ou si force). Les mutations sont deja durables
+    dans le journal : sans compaction, il n'y a rien a ecrire.
+    La compaction archive au passage les vieux paris regles (_archive_old_bets).
+    """
+    global _flush_timer, _index
+    with _timer_lock:
+        if _flush_timer is not None:
+            _flush_timer.cancel()
+            _flush_timer = None
+    with _lock.write():
+        if not _dirty or _cache is None:
+            return
+        try:
+            journal_size = os.path.getsize(JOURNAL_FILE)
+        except OSError:
+            journal_size = 0
+        if force or journal_size >= JOURNAL_MAX_BYTES:
+            if len(_cache["bets"]) > ARCHIVE_MIN_BETS and _archive_old_bets(_cache):
+                _index = _build_index(_cache)
+            _save_bankroll(_cache)
+
+
+def _archive_old_bets(data, older_than_days=ARCHIVE_AFTER_DAYS):
+    """
+    Deplace les paris regles avant la date limite vers ARCHIVE_FILE
+    (une ligne JSON par pari, gzip en ajout). Leurs totaux sont conserves
+    dans data["archived"] pour que le resume reste exact.
+    Retourne le nombre de paris archives.
+    """
+    cutoff = int(time.time()) - older_than_days * 86400
+    keep, old = [], []
+    for bet in data["bets"]:
+        if bet["status"] != "pending" and (bet.get("settled_at") or 0) < cutoff:
+            old.append(bet)
+        else:
+            keep.append(bet)
+    if not old:
+        return 0
+
+    with gzip.open(ARCHIVE_FILE, "ab") as f:
+        for bet in old:
+            f.write(orjson.dumps(bet) + b"\n")
+
+    archived = data.setdefault("archived", {
+        "bets": 0, "won": 0, "lost": 0, "profit": 0, "settled_stakes": 0,
+    })
+    archived["bets"] += len(old)
+    for bet in old:
+        if bet["status"] in ("won", "lost"):
+            archived[bet["status"]] += 1
+            archived["profit"] += bet["profit"] or 0
+            archived["settled_stakes"] += bet["stake"]
+    data["bets"] = keep
+    print(f"[bankroll] {len(old)} paris archives")
+    return len(old)
+
+
+def _save_bankroll(data):
+    """
+    Sauvegarde atomique du bankroll sur disque (snapshot), puis vide le journal.
+    JSON compact (orjson), fichier temporaire fsync avant le rename ; la version
+    precedente est conservee dans bankroll.json.bak.
+    """
+    global _dirty
+    data["last_updated"] = int(time.time())
+    if os.path.exists(BANKROLL_FILE):
+        shutil.copyfile(BANKROLL_FILE, BANKROLL_FILE + ".bak")
+    tmp = BANKROLL_FILE + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(orjson.dumps(data))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, BANKROLL_FILE)
+    # Le snapshot contient tout : le journal repart de zero
+    open(JOURNAL_FILE, "w").close()
+    _dirty = False
+
+
+# Ne pas perdre une ecriture differee a l'arret du serveur
+atexit.register(flush)
+
+
+# ── Kelly Criterion ──
+
+def _kelly_batch(odds, fair_probs_pct):
+    """
+    Fractions de Kelly (plafonnees) pour un lot de candidats, en une passe.
+    Ne depend pas du bankroll : la mise est bankroll * fraction, calculee
+    au moment du placement (le bankroll baisse apres chaque pari).
+
+    Returns:
+        liste de (kelly_full, kelly_fraction), (0, 0) si pas d'avantage
+    """
+    frac, cap = KELLY_FRACTION, MAX_STAKE_PERCENT
+    out = []
+    for o, p_pct in zip(odds, fair_probs_pct):
+        p = p_pct / 100.0
+        b = o - 1.0
+        full = (b * p - (1.0 - p)) / b if b > 0 and p > 0 else 0.0
+        out.append((full, min(full * frac, cap)) if full > 0 else (0.0, 0.0))
+    return out
 
 
 # ── Placement des paris ──
@@ -101,46 +496,40 @@ def place_bets(value_bets):
     if not AUTO_BET:
         return {"placed": 0, "skipped": len(value_bets), "details": []}
 
-    with _lock:
+    with _lock.write():
         data = _load_bankroll()
-
-        # Cles existantes pour dedup
-        existing_keys = set()
-        for b in data["bets"]:
-            key = f"{b.get('match_id', '')}_{b['bet_on']}_{b['market']}"
-            existing_keys.add(key)
+        existing_keys = _index["dedup_keys"]
 
         placed = []
-        skipped = 0
 
-        for vb in value_bets:
-            match_id = vb.get("match_id", "")
-            if not match_id:
-                skipped += 1
-                continue
+        # Filtres qualite
+        candidates = [
+            vb for vb in value_bets
+            if vb.get("match_id", "")
+            and vb["ev_percent"] >= MIN_EV_TO_BET
+            and vb.get("num_books", 0) >= MIN_BOOKS_TO_BET
+        ]
+        skipped = len(value_bets) - len(candidates)
 
-            # Dedup
-            dedup_key = f"{match_id}_{vb['bet_on']}_{vb['market']}"
-            if dedup_key in existing_keys:
-                skipped += 1
-                continue
+        min_stake = _to_cents(MIN_STAKE)
 
-            # Filtres qualite
-            if vb["ev_percent"] < MIN_EV_TO_BET:
-                skipped += 1
-                continue
-            if vb.get("num_books", 0) < MIN_BOOKS_TO_BET:
+        # Fractions de Kelly de tout le lot en une passe
+        fractions = _kelly_batch(
+            [vb["winamax_odds"] for vb in candidates],
+            [vb["fair_prob"] for vb in candidates],
+        )
+
+        for vb, (_, kelly_frac) in zip(candidates, fractions):
+            match_id = vb["match_id"]
+
+            # Dedup (existing_keys grossit a chaque placement)
+            if (match_id, vb["bet_on"], vb["market"]) in existing_keys:
                 skipped += 1
                 continue
 
-            # Calcul mise Kelly
-            sizing = calculate_kelly_stake(
-                vb["winamax_odds"],
-                vb["fair_prob"],
-                data["current_bankroll"],
-            )
-
-            if sizing["stake"] <= 0:
+            # Mise Kelly sur le bankroll courant (centimes)
+            stake = round(data["current_bankroll"] * kelly_frac)
+            if stake < min_stake or stake <= 0:
                 skipped += 1
                 continue
 
@@ -160,10 +549,10 @@ def place_bets(value_bets):
                 "ev_percent": vb["ev_percent"],
                 "match_id": match_id,
                 "start_time": vb.get("start_time", 0),
-                "stake": sizing["stake"],
-                "kelly_fraction": sizing["kelly_fraction"],
-                "kelly_used": sizing["kelly_used"],
-                "potential_return": round(sizing["stake"] * vb["winamax_odds"], 2),
+                "stake": stake,
+                "kelly_fraction": round(kelly_frac, 6),
+                "kelly_used": KELLY_FRACTION,
+                "potential_return": round(stake * vb["winamax_odds"]),
                 "status": "pending",
                 "settled_at": None,
                 "profit": None,
@@ -171,18 +560,58 @@ def place_bets(value_bets):
             }
 
             data["bets"].append(bet_record)
-            data["current_bankroll"] = round(data["current_bankroll"] - sizing["stake"], 2)
-            data["total_staked"] = round(data["total_staked"] + sizing["stake"], 2)
-            existing_keys.add(dedup_key)
+            _index_placed(bet_record)
+            _mark_dirty()
+            data["current_bankroll"] -= stake
+            data["total_staked"] += stake
+            _append_event("place", {"bet": bet_record}, data)
             placed.append(bet_record)
 
-        _save_bankroll(data)
-
-    return {"placed": len(placed), "skipped": skipped, "details": placed}
+    return {"placed": len(placed), "skipped": skipped, "details": [_bet_view(b) for b in placed]}
 
 
 # ── Settlement des paris ──
 
+# Rapport de reglement par pari (settle_bets avec force=True) : champs bruts
+# uniquement, le texte affiche est construit par format_report a la sortie.
+#   minutes : avant le coup d'envoi (not_started) ou depuis (in_progress)
+#   profit  : en centimes (won / lost)
+_Report = namedtuple(
+    "_Report", "bet_id match bet_on reason score profit minutes error",
+    defaults=(None, None, None, None),
+)
+
+_REPORT_MESSAGES = {
+    "no_result": "Resultat pas encore disponible",
+    "no_score": "Score non disponible pour resoudre ce marche",
+    "void": "Match annule — mise remboursee",
+}
+
+
+def format_report(report):
+    """Convertit un _Report en dict pour l'API, avec son message lisible."""
+    reason = report.reason
+    if reason == "not_started":
+        message = f"Coup d'envoi dans {report.minutes // 60}h{report.minutes % 60:02d}"
+    elif reason == "in_progress":
+        message = f"Match en cours ({report.minutes} min)"
+    elif reason == "error":
+        message = f"Erreur: {report.error[:60]}"
+    elif reason == "won":
+        message = f"GAGNE ! Score: {report.score} — +{_from_cents(report.profit):.2f} EUR"
+    elif reason == "lost":
+        message = f"PERDU. Score: {report.score} — {_from_cents(report.profit):.2f} EUR"
+    else:
+        message = _REPORT_MESSAGES.get(reason, "")
+    return {
+        "bet_id": report.bet_id,
+        "match": report.match,
+        "bet_on": report.bet_on,
+        "reason": reason,
+        "message": message,
+    }
+
+
 def settle_bets(get_result_fn, force=False):
     """
     Verifie les paris en attente et les resout (won/lost/void).
@@ -193,100 +622,92 @@ def settle_bets(get_result_fn, force=False):
 
     Returns:
         dict avec settled, still_pending, details, bet_reports
+        (bet_reports : liste de _Report, vide si force=False ; voir format_report)
     """
-    with _lock:
+    with _lock.write():
         data = _load_bankroll()
         settled = []
         still_pending = 0
         now = int(time.time())
         bet_reports = []
 
-        for bet in data["bets"]:
-            if bet["status"] != "pending":
-                continue
+        # Sans force, seuls les paris commences depuis plus de 2h (ou sans
+        # horaire) sont a verifier : prefixe de pending_by_start.
+        # Copie : les paris regles sortent de l'index pendant la boucle.
+        by_start = _index["pending_by_start"]
+        if force:
+            to_check = list(by_start)
+        else:
+            to_check = by_start[:bisect.bisect_right(by_start, now - 7200, key=_start_time)]
+            still_pending += len(by_start) - len(to_check)
 
-            match_label = f"{bet['home']} vs {bet['away']}"
+        for bet in to_check:
+            home = bet.get("home", "")
+            away = bet.get("away", "")
             start = bet.get("start_time", 0)
+            match_label = f"{home} vs {away}" if force else None
 
             # Match pas encore commence
             if start > 0 and start > now:
                 still_pending += 1
                 if force:
-                    remaining = start - now
-                    hours = remaining // 3600
-                    mins = (remaining % 3600) // 60
-                    bet_reports.append({
-                        "bet_id": bet["bet_id"],
-                        "match": match_label,
-                        "bet_on": bet["bet_on"],
-                        "reason": "not_started",
-                        "message": f"Coup d'envoi dans {hours}h{mins:02d}",
-                    })
+                    bet_reports.append(_Report(
+                        bet["bet_id"], match_label, bet["bet_on"], "not_started",
+                        minutes=(start - now) // 60,
+                    ))
                 continue
 
             # Match commence mais < 2h (probablement en cours)
             if start > 0 and start > now - 7200:
                 still_pending += 1
                 if force:
-                    elapsed = (now - start) // 60
-                    bet_reports.append({
-                        "bet_id": bet["bet_id"],
-                        "match": match_label,
-                        "bet_on": bet["bet_on"],
-                        "reason": "in_progress",
-                        "message": f"Match en cours ({elapsed} min)",
-                    })
+                    bet_reports.append(_Report(
+                        bet["bet_id"], match_label, bet["bet_on"], "in_progress",
+                        minutes=(now - start) // 60,
+                    ))
                 continue
 
             # Essayer de recuperer le resultat
             try:
                 result = get_result_fn(
                     bet["match_id"],
-                    home=bet.get("home", ""),
-                    away=bet.get("away", ""),
-                    start_time=bet.get("start_time", 0),
+                    home=home,
+                    away=away,
+                    start_time=start,
                     sport=bet.get("sport", "Football"),
                 )
             except Exception as e:
                 print(f"[bankroll] Erreur result check {bet['match_id']}: {e}")
                 still_pending += 1
                 if force:
-                    bet_reports.append({
-                        "bet_id": bet["bet_id"],
-                        "match": match_label,
-                        "bet_on": bet["bet_on"],
-                        "reason": "error",
-                        "message": f"Erreur: {str(e)[:60]}",
-                    })
+                    bet_reports.append(_Report(
+                        bet["bet_id"], match_label, bet["bet_on"], "error",
+                        error=str(e),
+                    ))
                 continue
 
             if result is None:
                 still_pending += 1
                 if force:
-                    bet_reports.append({
-                        "bet_id": bet["bet_id"],
-                        "match": match_label,
-                        "bet_on": bet["bet_on"],
-                        "reason": "no_result",
-                        "message": "Resultat pas encore disponible",
-                    })
+                    bet_reports.append(_Report(
+                        bet["bet_id"], match_label, bet["bet_on"], "no_result",
+                    ))
                 continue
 
             if result.get("status") == "cancelled":
                 bet["status"] = "void"
                 bet["settled_at"] = now
-                bet["profit"] = 0.0
+                bet["profit"] = 0
                 bet["result_info"] = "Annule"
-                data["current_bankroll"] = round(data["current_bankroll"] + bet["stake"], 2)
+                data["current_bankroll"] += bet["stake"]
                 settled.append(bet)
+                _index_settled(bet)
+                _append_event("settle", _settle_payload(bet), data)
+                _mark_dirty()
                 if force:
-                    bet_reports.append({
-                        "bet_id": bet["bet_id"],
-                        "match": match_label,
-                        "bet_on": bet["bet_on"],
-                        "reason": "void",
-                        "message": "Match annule — mise remboursee",
-                    })
+                    bet_reports.append(_Report(
+                        bet["bet_id"], match_label, bet["bet_on"], "void",
+                    ))
                 continue
 
             # Determiner victoire/defaite
@@ -299,70 +720,63 @@ def settle_bets(get_result_fn, force=False):
             if won is None:
                 still_pending += 1
                 if force:
-                    bet_reports.append({
-                        "bet_id": bet["bet_id"],
-                        "match": match_label,
-                        "bet_on": bet["bet_on"],
-                        "reason": "no_result",
-                        "message": "Score non disponible pour resoudre ce marche",
-                    })
+                    bet_reports.append(_Report(
+                        bet["bet_id"], match_label, bet["bet_on"], "no_score",
+                        score=score,
+                    ))
                 continue
 
             if won:
                 bet["status"] = "won"
-                payout = round(bet["stake"] * bet["winamax_odds"], 2)
-                bet["profit"] = round(payout - bet["stake"], 2)
-                data["current_bankroll"] = round(data["current_bankroll"] + payout, 2)
-                data["total_returned"] = round(data["total_returned"] + payout, 2)
+                payout = round(bet["stake"] * bet["winamax_odds"])
+                bet["profit"] = payout - bet["stake"]
+                data["current_bankroll"] += payout
+                data["total_returned"] += payout
                 if force:
-                    bet_reports.append({
-                        "bet_id": bet["bet_id"],
-                        "match": match_label,
-                        "bet_on": bet["bet_on"],
-                        "reason": "won",
-                        "message": f"GAGNE ! Score: {score} — +{bet['profit']:.2f} EUR",
-                    })
+                    bet_reports.append(_Report(
+                        bet["bet_id"], match_label, bet["bet_on"], "won",
+                        score=score, profit=bet["profit"],
+                    ))
             else:
                 bet["status"] = "lost"
-                bet["profit"] = round(-bet["stake"], 2)
+                bet["profit"] = -bet["stake"]
                 if force:
-                    bet_reports.append({
-                        "bet_id": bet["bet_id"],
-                        "match": match_label,
-                        "bet_on": bet["bet_on"],
-                        "reason": "lost",
-                        "message": f"PERDU. Score: {score} — {bet['profit']:.2f} EUR",
-                    })
+                    bet_reports.append(_Report(
+                        bet["bet_id"], match_label, bet["bet_on"], "lost",
+                        score=score, profit=bet["profit"],
+                    ))
 
             bet["settled_at"] = now
             bet["result_info"] = score
             settled.append(bet)
-
-        _save_bankroll(data)
+            _index_settled(bet)
+            _append_event("settle", _settle_payload(bet), data)
+            _mark_dirty()
 
     return {
         "settled": len(settled),
         "still_pending": still_pending,
-        "details": settled,
+        "details": [_bet_view(b) for b in settled],
         "bet_reports": bet_reports,
     }
 
 
+_DRAW_NAMES = frozenset({"match nul", "nul", "draw", "x", "tie"})
+_SCORE_RE = re.compile(r"(\d+)\D+(\d+)")
+
+
 def _check_win(bet_on, winning_outcomes):
     """Verifie si bet_on fait partie des outcomes gagnants (fuzzy)."""
-    from ev_calculator import _normalize_name
-
     bet_norm = _normalize_name(bet_on)
-    draw_names = {"match nul", "nul", "draw", "x", "tie"}
 
     for w in winning_outcomes:
         if _normalize_name(w) == bet_norm:
             return True
 
     # Match nul
-    if bet_norm in draw_names:
+    if bet_norm in _DRAW_NAMES:
         for w in winning_outcomes:
-            if _normalize_name(w) in draw_names:
+            if _normalize_name(w) in _DRAW_NAMES:
                 return True
 
     return False
@@ -370,94 +784,94 @@ def _check_win(bet_on, winning_outcomes):
 
 def _parse_score(score_str):
     """Parse '2-1' ou '2:1' -> (2, 1). Retourne (-1, -1) si invalide."""
-    if not score_str:
-        return -1, -1
-    for sep in ["-", ":", " - ", " "]:
-        if sep in score_str:
-            parts = score_str.split(sep)
-            parts = [p.strip() for p in parts if p.strip().isdigit()]
-            if len(parts) >= 2:
-                return int(parts[0]), int(parts[1])
-    return -1, -1
+    m = _SCORE_RE.search(score_str) if score_str else None
+    return (int(m.group(1)), int(m.group(2))) if m else (-1, -1)
 
 
-def _check_win_extended(bet_on, result, market_type="h2h", threshold=None):
-    """
-    Determine si un pari est gagnant selon le market_type.
-    Retourne True/False, ou None si le resultat ne peut pas etre determine.
-    """
-    if market_type == "h2h":
-        return _check_win(bet_on, result.get("winning_outcomes", []))
+_OVER_TOKENS = frozenset(("plus", "over"))
+_YES_TOKENS = frozenset(("oui", "yes"))
+
 
-    score = result.get("score", "")
-    hs, as_ = _parse_score(score)
+def _check_h2h(bet_on, result, threshold):
+    return _check_win(bet_on, result.get("winning_outcomes", []))
 
+
+def _check_ou(bet_on, result, threshold):
+    hs, as_ = _parse_score(result.get("score", ""))
     if hs < 0 or as_ < 0:
         return None  # Score invalide, ne peut pas determiner
+    total = hs + as_
+    over = not _OVER_TOKENS.isdisjoint(bet_on.lower().split())
+    return total > threshold if over else total <= threshold
 
-    if market_type == "over_under":
-        total = hs + as_
-        label = bet_on.lower()
-        if any(k in label for k in ["plus", "over"]):
-            return total > threshold
-        else:
-            return total <= threshold
 
-    if market_type == "btts":
-        btts = hs > 0 and as_ > 0
-        label = bet_on.lower()
-        return btts if any(k in label for k in ["oui", "yes"]) else not btts
+def _check_btts(bet_on, result, threshold):
+    hs, as_ = _parse_score(result.get("score", ""))
+    if hs < 0 or as_ < 0:
+        return None
+    btts = hs > 0 and as_ > 0
+    yes = not _YES_TOKENS.isdisjoint(bet_on.lower().split())
+    return btts if yes else not btts
+
 
+def _check_unknown(bet_on, result, threshold):
     return None
 
 
+_MARKET_HANDLERS = {
+    "h2h": _check_h2h,
+    "over_under": _check_ou,
+    "btts": _check_btts,
+}
+
+
+def _check_win_extended(bet_on, result, market_type="h2h", threshold=None):
+    """
+    Determine si un pari est gagnant selon le market_type.
+    Retourne True/False, ou None si le resultat ne peut pas etre determine.
+    """
+    return _MARKET_HANDLERS.get(market_type, _check_unknown)(bet_on, result, threshold)
+
+
 # ── Statistiques ──
 
 def get_bankroll_summary():
     """Retourne l'etat complet du bankroll pour le dashboard."""
-    with _lock:
-        data = _load_bankroll()
+    # Lecture seule : plusieurs resumes peuvent etre calcules en parallele
+    with _lock.read():
+        return _summarize(_load_bankroll())
 
-    bets = data["bets"]
-
-    pending = [b for b in bets if b["status"] == "pending"]
-    won = [b for b in bets if b["status"] == "won"]
-    lost = [b for b in bets if b["status"] == "lost"]
-    settled = won + lost
 
-    total_profit = sum(b["profit"] for b in settled if b["profit"] is not None)
-    total_settled_stakes = sum(b["stake"] for b in settled)
-    win_rate = (len(won) / len(settled) * 100) if settled else 0
+def _summarize(data):
+    """
+    Construit le resume du bankroll (appele avec _lock tenu en lecture).
+    Lit les compteurs de l'index, sans parcourir l'historique ; les
+    centimes internes sont convertis en EUR ici.
+    """
+    bets = data["bets"]
+    won = _index["won"]
+    settled_count = won + _index["lost"]
+    total_profit = _index["profit"]
+    total_settled_stakes = _index["settled_stakes"]
+    win_rate = (won / settled_count * 100) if settled_count else 0
     roi = (total_profit / total_settled_stakes * 100) if total_settled_stakes > 0 else 0
 
-    # Historique P/L pour le graphique
-    pl_history = []
-    cumulative = 0
-    for b in sorted(settled, key=lambda x: x.get("settled_at", 0)):
-        cumulative += b["profit"] or 0
-        pl_history.append({
-            "timestamp": b.get("settled_at", 0),
-            "cumulative_pl": round(cumulative, 2),
-            "bankroll": round(data["initial_bankroll"] + cumulative, 2),
-            "bet_id": b["bet_id"],
-        })
-
-    # Paris recents (50 max, plus recents d'abord)
-    recent = sorted(bets, key=lambda x: x.get("placed_at", 0), reverse=True)[:50]
+    # Paris recents (50 max, plus recents d'abord) : bets est dans l'ordre de placement
+    recent = [_bet_view(b) for b in reversed(bets[-50:])]
 
     return {
-        "initial_bankroll": data["initial_bankroll"],
-        "current_bankroll": data["current_bankroll"],
-        "total_staked": data["total_staked"],
-        "total_returned": round(data["total_returned"], 2),
-        "total_profit": round(total_profit, 2),
-        "total_bets": len(bets),
-        "pending_bets": len(pending),
-        "won_bets": len(won),
-        "lost_bets": len(lost),
+        "initial_bankroll": _from_cents(data["initial_bankroll"]),
+        "current_bankroll": _from_cents(data["current_bankroll"]),
+        "total_staked": _from_cents(data["total_staked"]),
+        "total_returned": _from_cents(data["total_returned"]),
+        "total_profit": _from_cents(total_profit),
+        "total_bets": len(bets) + _index["archived_bets"],
+        "pending_bets": len(_index["pending"]),
+        "won_bets": won,
+        "lost_bets": _index["lost"],
         "win_rate": round(win_rate, 1),
         "roi": round(roi, 1),
-        "pl_history": pl_history,
+        "pl_history": _index["pl_history"][-PL_HISTORY_MAX_POINTS:],
         "recent_bets": recent,
         "created_at": data.get("created_at", 0),
     }
@@ -480,9 +894,9 @@ def settle_bet_manually(bet_id, result, score=""):
     if result not in ("won", "lost", "void"):
         return {"success": False, "message": f"Résultat invalide: {result}"}
 
-    with _lock:
+    with _lock.write():
         data = _load_bankroll()
-        bet = next((b for b in data["bets"] if b["bet_id"] == bet_id), None)
+        bet = _index["by_id"].get(bet_id)
 
         if not bet:
             return {"success": False, "message": f"Pari {bet_id} introuvable"}
@@ -494,23 +908,25 @@ def settle_bet_manually(bet_id, result, score=""):
         bet["result_info"] = score or "manuel"
 
         if result == "won":
-            payout = round(bet["stake"] * bet["winamax_odds"], 2)
-            bet["profit"] = round(payout - bet["stake"], 2)
+            payout = round(bet["stake"] * bet["winamax_odds"])
+            bet["profit"] = payout - bet["stake"]
             bet["status"] = "won"
-            data["current_bankroll"] = round(data["current_bankroll"] + payout, 2)
-            data["total_returned"] = round(data["total_returned"] + payout, 2)
-            msg = f"GAGNE — +{bet['profit']:.2f} EUR"
+            data["current_bankroll"] += payout
+            data["total_returned"] += payout
+            msg = f"GAGNE — +{_from_cents(bet['profit']):.2f} EUR"
         elif result == "lost":
-            bet["profit"] = round(-bet["stake"], 2)
+            bet["profit"] = -bet["stake"]
             bet["status"] = "lost"
-            msg = f"PERDU — {bet['profit']:.2f} EUR"
+            msg = f"PERDU — {_from_cents(bet['profit']):.2f} EUR"
         else:  # void
-            bet["profit"] = 0.0
+            bet["profit"] = 0
             bet["status"] = "void"
-            data["current_bankroll"] = round(data["current_bankroll"] + bet["stake"], 2)
+            data["current_bankroll"] += bet["stake"]
             msg = "VOID — mise remboursée"
 
-        _save_bankroll(data)
+        _index_settled(bet)
+        _append_event("settle", _settle_payload(bet), data)
+        _mark_dirty()
 
     return {"success": True, "message": msg, "summary": get_bankroll_summary()}
 
@@ -521,15 +937,10 @@ def reset_bankroll(amount=None):
     """Reinitialise le bankroll."""
     if amount is None:
         amount = BANKROLL_INITIAL
-    with _lock:
-        data = {
-            "initial_bankroll": amount,
-            "current_bankroll": amount,
-            "total_staked": 0.0,
-            "total_returned": 0.0,
-            "created_at": int(time.time()),
-            "last_updated": int(time.time()),
-            "bets": [],
-        }
+    global _cache, _index
+    with _lock.write():
+        data = _new_bankroll(amount)
+        _cache = data
+        _index = _build_index(data)
         _save_bankroll(data)
     return get_bankroll_summary()
@@ -0,0 +1,51 @@
+"""
+Resolution du chemin du binaire chromedriver, partagee par scraper (Winamax)
+et odds_api (Oddsportal).
+ChromeDriverManager().install() interroge le reseau a chaque appel : le chemin
+obtenu est memorise en memoire et sur disque, et n'est re-verifie qu'une fois
+par semaine ou quand le driver refuse de demarrer (force_refresh).
+"""
+
+import os
+import threading
+import time
+
+CHROMEDRIVER_PATH_FILE = os.path.join(os.path.expanduser("~"), ".cache", "ev-finder", "chromedriver_path")
+CHROMEDRIVER_PATH_TTL = 7 * 24 * 3600  # re-verifier la version une fois par semaine
+
+_chromedriver_path = None
+_chromedriver_lock = threading.Lock()
+
+
+def get_chromedriver_path(force_refresh=False):
+    """
+    Chemin du binaire chromedriver : memoire, puis CHROMEDRIVER_PATH_FILE (moins
+    de CHROMEDRIVER_PATH_TTL, binaire toujours executable), sinon ChromeDriverManager.
+    """
+    global _chromedriver_path
+    with _chromedriver_lock:
+        if _chromedriver_path and not force_refresh:
+            return _chromedriver_path
+
+        if not force_refresh:
+            try:
+                if time.time() - os.path.getmtime(CHROMEDRIVER_PATH_FILE) < CHROMEDRIVER_PATH_TTL:
+                    with open(CHROMEDRIVER_PATH_FILE, encoding="utf-8") as f:
+                        path = f.read().strip()
+                    if path and os.access(path, os.X_OK):
+                        _chromedriver_path = path
+                        return path
+            except OSError:
+                pass
+
+        print("[chromedriver] Resolution via webdriver-manager...")
+        from webdriver_manager.chrome import ChromeDriverManager
+        path = ChromeDriverManager().install()
+        try:
+            os.makedirs(os.path.dirname(CHROMEDRIVER_PATH_FILE), exist_ok=True)
+            with open(CHROMEDRIVER_PATH_FILE, "w", encoding="utf-8") as f:
+                f.write(path)
+        except OSError as e:
+            print(f"[chromedriver] Cache du chemin non ecrit: {e}")
+        _chromedriver_path = path
+        return path
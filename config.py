@@ -6,6 +6,15 @@ MIN_EV_THRESHOLD = 0.0
 # Cache duree en secondes
 CACHE_DURATION = 600
 
+# Duree de validite des scrapes persistes sur disque (scrape_cache/, un fichier par cle)
+SCRAPE_CACHE_TTL = CACHE_DURATION
+
+# Scraping Oddsportal : nombre de sports traites en parallele
+ODDSPORTAL_WORKERS = 4
+
+# Scraping Winamax : pages par sport chargees en parallele (un Chrome par worker)
+WINAMAX_WORKERS = 4
+
 # Flask
 FLASK_HOST = "0.0.0.0"
 FLASK_PORT = 5120
@@ -6,7 +6,14 @@ du consensus pondere multi-bookmakers.
 Supporte les marches : h2h (1X2), over_under, btts.
 """
 
-from difflib import SequenceMatcher
+import functools
+import heapq
+import re
+import time
+from collections import namedtuple
+
+from rapidfuzz import fuzz
+from rapidfuzz.distance import JaroWinkler
 
 
 def implied_probability(decimal_odds):
@@ -16,26 +23,33 @@ def implied_probability(decimal_odds):
     return 1.0 / decimal_odds
 
 
+@functools.lru_cache(maxsize=8192)
+def _devig_cached(odds):
+    """(implied_prob, fair_prob) pour un tuple de cotes, ou None si aucune cote valide."""
+    implied_probs = [1.0 / o if o > 0 else 0 for o in odds]  # implied_probability, inline
+    total = sum(implied_probs)
+
+    if total == 0:
+        return None
+
+    return tuple((round(ip, 4), round(ip / total, 4)) for ip in implied_probs)
+
+
 def devig_odds(outcomes):
     """
     Supprime la marge du bookmaker (vig) par methode additive.
     Normalise les probabilites implicites pour qu'elles somment a 100%.
+    Le calcul est memoise sur le tuple des cotes (_devig_cached).
     """
-    implied_probs = [implied_probability(o["odds"]) for o in outcomes]
-    total = sum(implied_probs)
+    probs = _devig_cached(tuple(o["odds"] for o in outcomes))
 
-    if total == 0:
+    if probs is None:
         return outcomes
 
-    result = []
-    for o, ip in zip(outcomes, implied_probs):
-        fair_prob = ip / total
-        result.append({
-            **o,
-            "implied_prob": round(ip, 4),
-            "fair_prob": round(fair_prob, 4),
-        })
-    return result
+    return [
+        {**o, "implied_prob": ip, "fair_prob": fp}
+        for o, (ip, fp) in zip(outcomes, probs)
+    ]
 
 
 def calculate_ev(winamax_odds, true_probability):
@@ -47,8 +61,9 @@ def calculate_ev(winamax_odds, true_probability):
     return round(ev * 100, 2)
 
 
+@functools.lru_cache(maxsize=4096)
 def _normalize_name(name):
-    """Normalise un nom d'equipe pour le matching."""
+    """Normalise un nom d'equipe pour le matching (memoise : memes equipes a chaque refresh)."""
     n = name.lower().strip()
     for remove in ["fc ", " fc", "ac ", " ac", "sc ", " sc", "as ", " as",
                     "ss ", " ss", "us ", " us", "rc ", " rc"]:
@@ -57,65 +72,152 @@ def _normalize_name(name):
 
 
 def _similarity(a, b):
-    """Score de similarite entre deux chaines."""
-    return SequenceMatcher(None, _normalize_name(a), _normalize_name(b)).ratio()
+    """Score de similarite entre deux chaines (0..1, ratio InDel de rapidfuzz)."""
+    return fuzz.ratio(_normalize_name(a), _normalize_name(b)) / 100.0
+
+
+def _block_keys(names):
+    """Cles de blocage d'un evenement : prefixe de 3 lettres et mots (>= 3 lettres) des equipes."""
+    keys = set()
+    for n in names:
+        if n:
+            keys.add(n[:3])
+            keys.update(t for t in n.split() if len(t) >= 3)
+    return keys
+
+
+def _score_matrix(winamax_events, reference_events, threshold=0.0):
+    """
+    Scores de similarite WM x ref (0..1) : moyenne domicile/exterieur,
+    dans le sens direct ou inverse (le meilleur des deux).
+    Seuls les scores >= threshold sont conserves.
+
+    Matrice creuse (une ligne = dict index ref -> score) : seules les
+    references partageant une cle de blocage avec l'event WM sont scorees ;
+    a defaut de candidat, toutes les references le sont.
+    Les noms sont normalises une seule fois par evenement.
+    """
+    ratio = fuzz.ratio
+    wm_names = [(_normalize_name(e.get("home", "")), _normalize_name(e.get("away", "")))
+                for e in winamax_events]
+    ref_names = [(_normalize_name(e.get("home_team", "")), _normalize_name(e.get("away_team", "")))
+                 for e in reference_events]
+
+    blocks = {}
+    for j, names in enumerate(ref_names):
+        for key in _block_keys(names):
+            blocks.setdefault(key, []).append(j)
+    all_refs = range(len(ref_names))
+
+    # Un ratio sous `cutoff` ne peut pas atteindre le seuil (l'autre vaut au
+    # plus 100) : rapidfuzz l'abandonne alors tot et renvoie 0.
+    # (marge de 1e-6 contre l'arrondi de threshold * 200)
+    cutoff = max(threshold * 200 - 100 - 1e-6, 0)
+
+    matrix = []
+    for wh, wa in wm_names:
+        candidates = set()
+        for key in _block_keys((wh, wa)):
+            candidates.update(blocks.get(key, ()))
+        row = {}
+        for j in (candidates or all_refs):
+            rh, ra = ref_names[j]
+            score = max(
+                ratio(wh, rh, score_cutoff=cutoff) + ratio(wa, ra, score_cutoff=cutoff),
+                ratio(wh, ra, score_cutoff=cutoff) + ratio(wa, rh, score_cutoff=cutoff),
+            )
+            score /= 200.0
+            if score >= threshold:
+                row[j] = score
+        matrix.append(row)
+    return matrix
+
+
+# Cache des appariements par liste de noms (les memes matchs reviennent a
+# chaque refresh de la journee)
+_match_cache = {}
+_match_cache_ts = {}
+MATCH_CACHE_TTL = 600  # 10 minutes, comme les stubs Oddsportal
 
 
 def match_events(winamax_events, reference_events, threshold=0.55):
     """
     Match les evenements Winamax avec les evenements de reference
     par fuzzy matching sur les noms d'equipes.
+    Le resultat (paires d'index) est mis en cache MATCH_CACHE_TTL secondes.
     """
-    matched = []
-    used_refs = set()
-
-    for wm in winamax_events:
-        best_match = None
-        best_score = 0
-
-        for i, ref in enumerate(reference_events):
-            if i in used_refs:
-                continue
-
-            home_score = _similarity(wm.get("home", ""), ref.get("home_team", ""))
-            away_score = _similarity(wm.get("away", ""), ref.get("away_team", ""))
-            score = (home_score + away_score) / 2
-
-            home_inv = _similarity(wm.get("home", ""), ref.get("away_team", ""))
-            away_inv = _similarity(wm.get("away", ""), ref.get("home_team", ""))
-            score_inv = (home_inv + away_inv) / 2
+    key = (
+        threshold,
+        tuple((e.get("home", ""), e.get("away", "")) for e in winamax_events),
+        tuple((e.get("home_team", ""), e.get("away_team", "")) for e in reference_events),
+    )
+    now = time.time()
+    if key in _match_cache and (now - _match_cache_ts.get(key, 0)) < MATCH_CACHE_TTL:
+        pairs = _match_cache[key]
+    else:
+        pairs = _assign_events(winamax_events, reference_events, threshold)
+        # Purge des entrees expirees (les listes changent d'un refresh a l'autre)
+        for k in [k for k, ts in _match_cache_ts.items() if now - ts >= MATCH_CACHE_TTL]:
+            _match_cache.pop(k, None)
+            _match_cache_ts.pop(k, None)
+        _match_cache[key] = pairs
+        _match_cache_ts[key] = now
+    return [(winamax_events[i], reference_events[j]) for i, j in pairs]
+
+
+def _assign_events(winamax_events, reference_events, threshold):
+    """
+    Paires (index WM, index ref) retenues.
 
-            best_local = max(score, score_inv)
+    Affectation globale : les paires sont retenues par score decroissant
+    (chaque evenement au plus une fois), et non dans l'ordre des events WM,
+    pour qu'un match mediocre ne "vole" pas la reference d'un meilleur.
+    """
+    matrix = _score_matrix(winamax_events, reference_events, threshold)
+    pairs = [
+        (score, i, j)
+        for i, row in enumerate(matrix)
+        for j, score in row.items()
+    ]
+    pairs.sort(key=lambda p: (-p[0], p[1], p[2]))
+
+    assigned = {}
+    used_refs = set()
+    for _, i, j in pairs:
+        if i in assigned or j in used_refs:
+            continue
+        assigned[i] = j
+        used_refs.add(j)
 
-            if best_local > best_score and best_local >= threshold:
-                best_score = best_local
-                best_match = (i, ref)
+    return [(i, assigned[i]) for i in sorted(assigned)]
 
-        if best_match:
-            used_refs.add(best_match[0])
-            matched.append((wm, best_match[1]))
 
-    return matched
+# ── Normalisation des outcomes par marche ──
 
+# Un motif compile par cote (ordre de priorite conserve : over avant under,
+# yes avant no) ; les noms d'outcomes se repetent, d'ou le cache.
+_OVER_RE = re.compile("plus|over", re.IGNORECASE)
+_UNDER_RE = re.compile("moins|under", re.IGNORECASE)
+_YES_RE = re.compile("oui|yes", re.IGNORECASE)
+_NO_RE = re.compile("non|no", re.IGNORECASE)
 
-# ── Normalisation des outcomes par marche ──
 
+@functools.lru_cache(maxsize=1024)
 def _normalize_ou_side(name):
     """Retourne 'over' ou 'under' depuis le nom d'un outcome O/U."""
-    n = name.lower()
-    if any(k in n for k in ["plus", "over"]):
+    if _OVER_RE.search(name):
         return "over"
-    if any(k in n for k in ["moins", "under"]):
+    if _UNDER_RE.search(name):
         return "under"
     return None
 
 
+@functools.lru_cache(maxsize=1024)
 def _normalize_btts_side(name):
     """Retourne 'yes' ou 'no' depuis le nom d'un outcome BTTS."""
-    n = name.lower()
-    if any(k in n for k in ["oui", "yes"]):
+    if _YES_RE.search(name):
         return "yes"
-    if any(k in n for k in ["non", "no"]):
+    if _NO_RE.search(name):
         return "no"
     return None
 
@@ -134,60 +236,151 @@ def _get_market_type(event):
     return "h2h"
 
 
+# ── Noyau EV ──
+
+# Outcomes d'un evenement en colonnes (noms, cotes) : extraits une fois des
+# dicts {"name", "odds"} du scraping, puis parcourus par index.
+_OutcomeBatch = namedtuple("_OutcomeBatch", "names odds")
+
+
+def _outcome_batch(outcomes):
+    return _OutcomeBatch(
+        tuple(o["name"] for o in outcomes),
+        tuple(o["odds"] for o in outcomes),
+    )
+
+
+def _fair_probs(batch):
+    """Probabilites devig des outcomes (meme ordre), ou None si aucune cote valide."""
+    probs = _devig_cached(batch.odds)
+    return [fp for _, fp in probs] if probs else None
+
+
+def _ev_kernel(odds, probs, min_ev):
+    """
+    Devig deja fait : calcule l'EV de chaque outcome WM et ne garde que les
+    value bets (min_ev < EV < 50). probs[i] a None = outcome sans reference.
+    Retourne [(index, ev)] ; les dicts ne sont construits que pour ceux-la.
+    """
+    survivors = []
+    for i, (o, p) in enumerate(zip(odds, probs)):
+        if p is None:
+            continue
+        ev = round((p * o - 1) * 100, 2)  # calculate_ev, inline
+        if min_ev < ev < 50:
+            survivors.append((i, ev))
+    return survivors
+
+
+def _value_bet(wm_event, ref_event, bet_on, wm_odds, prob, ev, market, market_type, threshold):
+    return {
+        "sport": wm_event.get("sport", ref_event.get("sport_title", "?")),
+        "home": wm_event.get("home", ref_event.get("home_team", "")),
+        "away": wm_event.get("away", ref_event.get("away_team", "")),
+        "market": market,
+        "market_type": market_type,
+        "market_threshold": threshold,
+        "bet_on": bet_on,
+        "winamax_odds": wm_odds,
+        "fair_prob": round(prob * 100, 1),
+        "implied_prob": round(implied_probability(wm_odds) * 100, 1),
+        "ev_percent": ev,
+        "commence_time": ref_event.get("commence_time", ""),
+        "num_books": ref_event.get("num_books", 1),
+        "match_id": wm_event.get("match_id", ""),
+        "start_time": wm_event.get("start_time", 0),
+    }
+
+
+def _side_probs(wm, ref, side_fn):
+    """Probabilite de reference de chaque outcome WM, appariee par cote (over/under, yes/no)."""
+    fair = _fair_probs(ref)
+    if fair is None:
+        return None
+    by_side = {}
+    for name, fp in zip(ref.names, fair):
+        side = side_fn(name)
+        if side:
+            by_side[side] = fp
+    return [by_side.get(side_fn(name)) for name in wm.names]
+
+
 # ── Sub-finders par marche ──
 
+def _threshold_key(event):
+    return event.get("market_threshold", 2.5)
+
+
+def _group_by(events, key):
+    """
+    Regroupe les events par cle en une passe, sans tri : les cles n'ont pas
+    a etre comparables (seuil None ou texte) et l'ordre d'origine est conserve.
+    """
+    groups = {}
+    for e in events:
+        groups.setdefault(key(e), []).append(e)
+    return groups
+
+
+_DRAW_NAMES = frozenset({"match nul", "nul", "draw", "x", "tie"})
+H2H_JW_CUTOFF = 0.85  # Jaro-Winkler, favorise les prefixes communs ("paris sg" / "paris saint germain")
+
+
+def _h2h_prob(wm_name, ref_items):
+    """
+    Probabilite de reference d'un outcome H2H (nom le plus proche, ou nul).
+    wm_name et ref_items [(nom, proba)] sont deja normalises.
+    """
+    # Nom identique (cas courant) : pas de calcul de similarite
+    for ref_name, prob in ref_items:
+        if ref_name == wm_name:
+            return prob
+
+    best_prob = None
+    best_sim = 0
+    for ref_name, prob in ref_items:
+        sim = JaroWinkler.normalized_similarity(wm_name, ref_name, score_cutoff=H2H_JW_CUTOFF)
+        if sim > best_sim:
+            best_sim = sim
+            best_prob = prob
+
+    # Fallback ratio InDel pour les noms sans prefixe commun ("marseille" / "olympique marseille")
+    if best_prob is None:
+        for ref_name, prob in ref_items:
+            sim = fuzz.ratio(wm_name, ref_name) / 100.0
+            if sim > best_sim and sim > 0.5:
+                best_sim = sim
+                best_prob = prob
+
+    # Fallback "Match nul" / "Draw" / "X"
+    if best_prob is None and wm_name in _DRAW_NAMES:
+        for ref_name, prob in ref_items:
+            if ref_name in _DRAW_NAMES:
+                return prob
+    return best_prob
+
+
 def _find_vb_h2h(wm_events, ref_events, min_ev):
     """Trouve les value bets sur le marche H2H (1X2)."""
     value_bets = []
     matches = match_events(wm_events, ref_events)
 
     for wm_event, ref_event in matches:
-        ref_outcomes = devig_odds(ref_event.get("outcomes", []))
-        fair_probs = {_normalize_name(o["name"]): o["fair_prob"] for o in ref_outcomes}
-
-        for wm_outcome in wm_event.get("outcomes", []):
-            wm_name = _normalize_name(wm_outcome["name"])
-            wm_odds = wm_outcome["odds"]
-
-            best_prob = None
-            best_sim = 0
-            for ref_name, prob in fair_probs.items():
-                sim = _similarity(wm_name, ref_name)
-                if sim > best_sim and sim > 0.5:
-                    best_sim = sim
-                    best_prob = prob
-
-            # Fallback "Match nul" / "Draw" / "X"
-            if best_prob is None:
-                draw_names = {"match nul", "nul", "draw", "x", "tie"}
-                if wm_name in draw_names:
-                    for ref_name, prob in fair_probs.items():
-                        if ref_name in draw_names:
-                            best_prob = prob
-                            break
-
-            if best_prob is None:
-                continue
-
-            ev = calculate_ev(wm_odds, best_prob)
-            if ev > min_ev and ev < 50:
-                value_bets.append({
-                    "sport": wm_event.get("sport", ref_event.get("sport_title", "?")),
-                    "home": wm_event.get("home", ref_event.get("home_team", "")),
-                    "away": wm_event.get("away", ref_event.get("away_team", "")),
-                    "market": wm_event.get("market", "h2h"),
-                    "market_type": "h2h",
-                    "market_threshold": None,
-                    "bet_on": wm_outcome["name"],
-                    "winamax_odds": wm_odds,
-                    "fair_prob": round(best_prob * 100, 1),
-                    "implied_prob": round(implied_probability(wm_odds) * 100, 1),
-                    "ev_percent": ev,
-                    "commence_time": ref_event.get("commence_time", ""),
-                    "num_books": ref_event.get("num_books", 1),
-                    "match_id": wm_event.get("match_id", ""),
-                    "start_time": wm_event.get("start_time", 0),
-                })
+        ref = _outcome_batch(ref_event.get("outcomes", []))
+        fair = _fair_probs(ref)
+        if fair is None:
+            continue
+        # Normalisation une seule fois par event, hors de la boucle de similarite
+        ref_items = list(zip(map(_normalize_name, ref.names), fair))
+
+        wm = _outcome_batch(wm_event.get("outcomes", []))
+        wm_names_norm = [_normalize_name(name) for name in wm.names]
+        probs = [_h2h_prob(name, ref_items) for name in wm_names_norm]
+        market = wm_event.get("market", "h2h")
+        for i, ev in _ev_kernel(wm.odds, probs, min_ev):
+            value_bets.append(_value_bet(
+                wm_event, ref_event, wm.names[i], wm.odds[i], probs[i], ev,
+                market, "h2h", None))
 
     return value_bets
 
@@ -197,15 +390,8 @@ def _find_vb_ou(wm_events, ref_events, min_ev):
     value_bets = []
 
     # Grouper par seuil pour eviter qu'un O/U 1.5 WM matche un O/U 2.5 ref
-    wm_by_threshold = {}
-    for e in wm_events:
-        t = e.get("market_threshold", 2.5)
-        wm_by_threshold.setdefault(t, []).append(e)
-
-    ref_by_threshold = {}
-    for e in ref_events:
-        t = e.get("market_threshold", 2.5)
-        ref_by_threshold.setdefault(t, []).append(e)
+    wm_by_threshold = _group_by(wm_events, _threshold_key)
+    ref_by_threshold = _group_by(ref_events, _threshold_key)
 
     for threshold, wm_group in wm_by_threshold.items():
         ref_group = ref_by_threshold.get(threshold, [])
@@ -213,42 +399,18 @@ def _find_vb_ou(wm_events, ref_events, min_ev):
             continue
 
         matches = match_events(wm_group, ref_group)
+        market = f"over_under_{threshold}"
 
         for wm_event, ref_event in matches:
-            ref_outcomes = devig_odds(ref_event.get("outcomes", []))
-            fair_probs = {}
-            for o in ref_outcomes:
-                side = _normalize_ou_side(o["name"])
-                if side:
-                    fair_probs[side] = o["fair_prob"]
-
-            for wm_outcome in wm_event.get("outcomes", []):
-                side = _normalize_ou_side(wm_outcome["name"])
-                if side not in fair_probs:
-                    continue
-
-                wm_odds = wm_outcome["odds"]
-                best_prob = fair_probs[side]
-                ev = calculate_ev(wm_odds, best_prob)
-
-                if ev > min_ev and ev < 50:
-                    value_bets.append({
-                        "sport": wm_event.get("sport", ref_event.get("sport_title", "?")),
-                        "home": wm_event.get("home", ref_event.get("home_team", "")),
-                        "away": wm_event.get("away", ref_event.get("away_team", "")),
-                        "market": f"over_under_{threshold}",
-                        "market_type": "over_under",
-                        "market_threshold": threshold,
-                        "bet_on": wm_outcome["name"],
-                        "winamax_odds": wm_odds,
-                        "fair_prob": round(best_prob * 100, 1),
-                        "implied_prob": round(implied_probability(wm_odds) * 100, 1),
-                        "ev_percent": ev,
-                        "commence_time": ref_event.get("commence_time", ""),
-                        "num_books": ref_event.get("num_books", 1),
-                        "match_id": wm_event.get("match_id", ""),
-                        "start_time": wm_event.get("start_time", 0),
-                    })
+            wm = _outcome_batch(wm_event.get("outcomes", []))
+            ref = _outcome_batch(ref_event.get("outcomes", []))
+            probs = _side_probs(wm, ref, _normalize_ou_side)
+            if probs is None:
+                continue
+            for i, ev in _ev_kernel(wm.odds, probs, min_ev):
+                value_bets.append(_value_bet(
+                    wm_event, ref_event, wm.names[i], wm.odds[i], probs[i], ev,
+                    market, "over_under", threshold))
 
     return value_bets
 
@@ -259,79 +421,61 @@ def _find_vb_btts(wm_events, ref_events, min_ev):
     matches = match_events(wm_events, ref_events)
 
     for wm_event, ref_event in matches:
-        ref_outcomes = devig_odds(ref_event.get("outcomes", []))
-        fair_probs = {}
-        for o in ref_outcomes:
-            side = _normalize_btts_side(o["name"])
-            if side:
-                fair_probs[side] = o["fair_prob"]
-
-        for wm_outcome in wm_event.get("outcomes", []):
-            side = _normalize_btts_side(wm_outcome["name"])
-            if side not in fair_probs:
-                continue
-
-            wm_odds = wm_outcome["odds"]
-            best_prob = fair_probs[side]
-            ev = calculate_ev(wm_odds, best_prob)
-
-            if ev > min_ev and ev < 50:
-                value_bets.append({
-                    "sport": wm_event.get("sport", ref_event.get("sport_title", "?")),
-                    "home": wm_event.get("home", ref_event.get("home_team", "")),
-                    "away": wm_event.get("away", ref_event.get("away_team", "")),
-                    "market": "btts",
-                    "market_type": "btts",
-                    "market_threshold": None,
-                    "bet_on": wm_outcome["name"],
-                    "winamax_odds": wm_odds,
-                    "fair_prob": round(best_prob * 100, 1),
-                    "implied_prob": round(implied_probability(wm_odds) * 100, 1),
-                    "ev_percent": ev,
-                    "commence_time": ref_event.get("commence_time", ""),
-                    "num_books": ref_event.get("num_books", 1),
-                    "match_id": wm_event.get("match_id", ""),
-                    "start_time": wm_event.get("start_time", 0),
-                })
+        wm = _outcome_batch(wm_event.get("outcomes", []))
+        ref = _outcome_batch(ref_event.get("outcomes", []))
+        probs = _side_probs(wm, ref, _normalize_btts_side)
+        if probs is None:
+            continue
+        for i, ev in _ev_kernel(wm.odds, probs, min_ev):
+            value_bets.append(_value_bet(
+                wm_event, ref_event, wm.names[i], wm.odds[i], probs[i], ev,
+                "btts", "btts", None))
 
     return value_bets
 
 
 # ── Point d'entree principal ──
 
-def find_value_bets(winamax_events, reference_events, min_ev=0.0):
+def _ev_percent(vb):
+    return vb["ev_percent"]
+
+
+def find_value_bets(winamax_events, reference_events, min_ev=0.0, *, top_k=None, market_types=None):
     """
     Identifie les paris EV+ en comparant Winamax au consensus multi-books.
     Supporte h2h, over_under et btts.
+
+    top_k : ne garder que les K meilleurs EV (heapq.nlargest, sans tri complet).
+    market_types : restreindre le calcul a ces marches ("h2h", "over_under", "btts").
     """
     # Separer par market_type
-    wm_by_type = {}
-    for e in winamax_events:
-        wm_by_type.setdefault(_get_market_type(e), []).append(e)
-
-    ref_by_type = {}
-    for e in reference_events:
-        ref_by_type.setdefault(_get_market_type(e), []).append(e)
+    wm_by_type = _group_by(winamax_events, _get_market_type)
+    ref_by_type = _group_by(reference_events, _get_market_type)
 
     value_bets = []
 
     # H2H (inclut h2h_2way)
-    wm_h2h = wm_by_type.get("h2h", []) + wm_by_type.get("h2h_2way", [])
-    ref_h2h = ref_by_type.get("h2h", [])
-    if wm_h2h and ref_h2h:
-        value_bets.extend(_find_vb_h2h(wm_h2h, ref_h2h, min_ev))
+    if market_types is None or "h2h" in market_types:
+        wm_h2h = wm_by_type.get("h2h", []) + wm_by_type.get("h2h_2way", [])
+        ref_h2h = ref_by_type.get("h2h", [])
+        if wm_h2h and ref_h2h:
+            value_bets.extend(_find_vb_h2h(wm_h2h, ref_h2h, min_ev))
 
     # Over/Under
-    wm_ou = wm_by_type.get("over_under", [])
-    ref_ou = ref_by_type.get("over_under", [])
-    if wm_ou and ref_ou:
-        value_bets.extend(_find_vb_ou(wm_ou, ref_ou, min_ev))
+    if market_types is None or "over_under" in market_types:
+        wm_ou = wm_by_type.get("over_under", [])
+        ref_ou = ref_by_type.get("over_under", [])
+        if wm_ou and ref_ou:
+            value_bets.extend(_find_vb_ou(wm_ou, ref_ou, min_ev))
 
     # BTTS
-    wm_btts = wm_by_type.get("btts", [])
-    ref_btts = ref_by_type.get("btts", [])
-    if wm_btts and ref_btts:
-        value_bets.extend(_find_vb_btts(wm_btts, ref_btts, min_ev))
-
-    value_bets.sort(key=lambda x: x["ev_percent"], reverse=True)
+    if market_types is None or "btts" in market_types:
+        wm_btts = wm_by_type.get("btts", [])
+        ref_btts = ref_by_type.get("btts", [])
+        if wm_btts and ref_btts:
+            value_bets.extend(_find_vb_btts(wm_btts, ref_btts, min_ev))
+
+    if top_k is not None:
+        return heapq.nlargest(top_k, value_bets, key=_ev_percent)
+    value_bets.sort(key=_ev_percent, reverse=True)
     return value_bets
@@ -11,32 +11,85 @@ Pourquoi Pinnacle ?
   Devigged Pinnacle = meilleure approximation de la vraie probabilite.
 """
 
+import os
 import re
 import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from html import unescape
+from urllib.parse import urlsplit
 
-_driver = None
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from chromedriver import get_chromedriver_path
+from config import ODDSPORTAL_WORKERS
+
+# ── Pool de drivers Chrome ──
+# Un driver par worker : chaque sport scrape en parallele dispose de son
+# propre navigateur (deja demarre d'un refresh a l'autre).
+DRIVER_POOL_SIZE = ODDSPORTAL_WORKERS
+DRIVER_MAX_USES = 20  # Recycler un driver apres N scrapes (fuites memoire Chrome)
+DRIVER_PROBE_AFTER = 30  # s sans chargement reussi avant de re-verifier la session
+
+_driver_pool = queue.Queue()
+for _i in range(DRIVER_POOL_SIZE):
+    _driver_pool.put({"slot": _i, "driver": None, "uses": 0, "last_ok": 0.0})
+_busy_slots = {}  # id(driver) -> slot emprunte
+
+MATCH_PAGE_DELAY = 1.2  # delai poli entre deux pages de match sur un meme driver
 
 # Cache des stubs de matchs par URL de league (evite de re-scraper l'overview)
 _match_stub_cache = {}
 _match_stub_cache_ts = {}
+# ETag de chaque overview -> (etag, ts du dernier scrape complet) : a expiration
+# des stubs, une requete conditionnelle suffit si la page n'a pas change
+_overview_etags = {}
+STUB_MAX_AGE = 3600  # au-dela, re-scrape complet meme si l'ETag est inchange (stubs HTTP uniquement)
 STUB_CACHE_TTL = 600  # 10 minutes
 
-
-def _get_driver():
-    """Cree ou reutilise un driver Chrome headless."""
-    global _driver
-    if _driver is not None:
-        try:
-            _driver.current_url
-            return _driver
-        except Exception:
-            _driver = None
-
+# Cache des events de reference par (sport, marches) -> (events, ts) : un
+# second appel dans la fenetre n'emprunte meme pas de driver
+_reference_cache = {}
+REFERENCE_CACHE_TTL = 90
+
+# Flags Chrome des drivers du pool : pas de GPU, d'extensions, de trafic de
+# fond ni de logs. (WebAssembly reste actif : le site peut en dependre)
+_CHROME_LEAN_FLAGS = (
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-sync",
+    "--disable-background-networking",
+    "--disable-default-apps",
+    "--disable-component-update",
+    "--disable-client-side-phishing-detection",
+    "--disable-features=Translate,MediaRouter",
+    "--metrics-recording-only",
+    "--mute-audio",
+    "--no-first-run",
+    "--disable-logging",
+    "--log-level=3",
+)
+
+# Ressources bloquees dans Chrome (motifs CDP Network.setBlockedURLs)
+_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf",
+]
+
+# Cache des cotes sharp par (match_url, market, threshold) -> (resultat, ts).
+# Les pages sans book sharp (None) sont aussi memorisees.
+_sharp_cache = {}
+
+
+def _new_driver(slot):
+    """Demarre un driver Chrome headless pour un slot du pool."""
     try:
         from selenium import webdriver
         from selenium.webdriver.chrome.service import Service
         from selenium.webdriver.chrome.options import Options
-        from webdriver_manager.chrome import ChromeDriverManager
 
         import tempfile, os as _os
         options = Options()
@@ -49,26 +102,223 @@ def _get_driver():
             "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
             "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
         )
-        # Repertoire de profil unique pour eviter les conflits avec l'instance Winamax
-        _ud = _os.path.join(tempfile.gettempdir(), "ev_odds_chrome")
+        # Sous-systemes inutiles au scraping (CPU / processus en moins par driver)
+        for flag in _CHROME_LEAN_FLAGS:
+            options.add_argument(flag)
+        # Repertoire de profil unique par slot (Chrome verrouille son profil,
+        # et evite les conflits avec l'instance Winamax)
+        _ud = _os.path.join(tempfile.gettempdir(), f"ev_odds_chrome_{slot}")
         options.add_argument(f"--user-data-dir={_ud}")
         options.add_experimental_option("excludeSwitches", ["enable-automation"])
         options.add_experimental_option("useAutomationExtension", False)
+        # Images desactivees des le profil ; CSS garde (innerText depend du rendu)
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+        })
+        # driver.get rend la main au DOMContentLoaded : _wait_ready attend ensuite
+        # le contenu utile plutot que le chargement complet de la page
+        options.page_load_strategy = "eager"
 
-        service = Service(ChromeDriverManager().install())
-        _driver = webdriver.Chrome(service=service, options=options)
-        _driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+        service = Service(get_chromedriver_path())
+        try:
+            driver = webdriver.Chrome(service=service, options=options)
+        except Exception:
+            # Chrome mis a jour depuis la mise en cache du chemin : re-resoudre
+            service = Service(get_chromedriver_path(force_refresh=True))
+            driver = webdriver.Chrome(service=service, options=options)
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
             "source": "Object.defineProperty(navigator, 'webdriver', {get: () => undefined});"
         })
-        print("[odds] Chrome headless demarre (reference)")
-        return _driver
+        # Extracteur sharp installe une fois par document (compile une fois,
+        # reutilise pour chaque onglet / seuil) : voir _sharp_rows
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+            "source": "window.__evSharpRows = function () {" + _SHARP_ROWS_JS + "};"
+        })
+        # Ni images ni polices : moins d'octets par page, le DOM reste identique
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": _BLOCKED_URLS})
+        print(f"[odds] Chrome headless demarre (reference #{slot})")
+        return driver
     except Exception as e:
         print(f"[odds] Impossible de demarrer Chrome: {e}")
         return None
 
 
+def _quit_driver(driver):
+    """Ferme un driver sans propager d'erreur."""
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+def acquire_driver(block=True):
+    """
+    Emprunte un driver au pool (bloque si tous sont occupes, sauf block=False).
+    Le driver est (re)cree s'il est mort ou a atteint DRIVER_MAX_USES.
+    Retourne None si Chrome ne peut pas demarrer (ou si aucun slot n'est
+    libre en mode non bloquant).
+    """
+    try:
+        slot = _driver_pool.get(block=block)
+    except queue.Empty:
+        return None
+    driver = slot["driver"]
+
+    if driver is not None and slot["uses"] >= DRIVER_MAX_USES:
+        print(f"[odds] Recyclage du driver #{slot['slot']} ({slot['uses']} utilisations)")
+        _quit_driver(driver)
+        driver = None
+    elif driver is not None and time.time() - slot["last_ok"] >= DRIVER_PROBE_AFTER:
+        # Sonde de session (un aller-retour WebDriver) seulement si le driver
+        # n'a pas charge de page avec succes recemment
+        try:
+            driver.current_url
+        except Exception:
+            driver = None
+
+    if driver is None:
+        driver = _new_driver(slot["slot"])
+        slot["driver"] = driver
+        slot["uses"] = 0
+        slot["last_ok"] = time.time()
+        if driver is None:
+            _driver_pool.put(slot)
+            return None
+
+    slot["uses"] += 1
+    _busy_slots[id(driver)] = slot
+    return driver
+
+
+def _get_page(driver, url):
+    """driver.get(url), puis note le driver comme vivant (voir DRIVER_PROBE_AFTER)."""
+    driver.get(url)
+    slot = _busy_slots.get(id(driver))
+    if slot is not None:
+        slot["last_ok"] = time.time()
+
+
+def release_driver(driver):
+    """Rend au pool un driver obtenu via acquire_driver()."""
+    if driver is None:
+        return
+    slot = _busy_slots.pop(id(driver), None)
+    if slot is not None:
+        _driver_pool.put(slot)
+
+
+# ── Attente du rendu ──
+# Conditions JS (booleen) verifiees par WebDriverWait apres driver.get : on
+# lit la page des qu'elle est rendue au lieu d'un sleep fixe. Le timeout
+# reprend l'ancienne duree, le pire cas est donc inchange.
+
+_OVERVIEW_READY_JS = "return !!document.querySelector(\"div[class*='eventRow']\");"
+_SHARP_READY_JS = '''
+    // Logo / lien sharp d'abord (simple requete DOM) ; le texte de toute la
+    // page (layout complet a chaque poll) seulement a defaut
+    if (document.querySelector(
+        "img[alt*='pinnacle' i], img[src*='pinnacle' i], a[href*='pinnacle' i], " +
+        "img[alt*='betfair' i], img[src*='betfair' i], a[href*='betfair' i]"
+    )) return true;
+    return !!document.body && /Pinnacle|Betfair/.test(document.body.innerText);
+'''
+READY_SETTLE = 0.3  # laisser les derniers noeuds se peupler une fois la condition vraie
+
+
+def _wait_ready(driver, condition_js, timeout):
+    """Attend que condition_js soit vrai (au plus timeout secondes), puis READY_SETTLE."""
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.25).until(
+            lambda d: d.execute_script(condition_js)
+        )
+    except Exception:
+        pass  # timeout : la page est lue telle quelle, comme apres l'ancien sleep
+    time.sleep(READY_SETTLE)
+
+
 # ── Phase 1 : extraction des stubs depuis la page overview ──
 
+# Session HTTP partagee (keep-alive) : tentee avant Selenium pour les overviews
+_http = requests.Session()
+_http.headers.update({
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
+    ),
+    "Accept-Language": "en-US,en;q=0.9,fr;q=0.8",
+    "Referer": "https://www.oddsportal.com/",
+})
+# Une connexion keep-alive par requete concurrente possible : chaque sport
+# (ODDSPORTAL_WORKERS en parallele) charge ses overviews sur DRIVER_POOL_SIZE threads
+_http.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=max(10, ODDSPORTAL_WORKERS * DRIVER_POOL_SIZE),
+    max_retries=Retry(total=2, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504)),
+))
+
+_ODDSPORTAL_BASE = "https://www.oddsportal.com"
+_LINK_RE = re.compile(r'<a\b[^>]*?href="(/[^"#]*)"[^>]*>(.*?)</a>', re.DOTALL | re.IGNORECASE)
+_TAG_RE = re.compile(r"<[^>]+>")
+_NUMERIC_RE = re.compile(r"^[\d:.+\-/]+$")
+_STUB_SKIP = frozenset({"X", "1", "2", "Draw", "Nul", "N/A", "-", "+"})
+
+
+def _stub_names(fragment):
+    """Lignes d'un fragment HTML qui ressemblent a des noms d'equipes (memes regles que le JS)."""
+    lines = (unescape(t).strip() for t in _TAG_RE.split(fragment))
+    return [
+        l for l in lines
+        if 2 < len(l) < 60 and l not in _STUB_SKIP and not _NUMERIC_RE.match(l)
+    ]
+
+
+def _extract_match_stubs_http(url, timeout=10):
+    """
+    Tente d'extraire les stubs depuis le HTML serveur, sans navigateur.
+    Retourne None si la page ne contient aucun lien de match exploitable
+    (rendu cote client ou challenge anti-bot) : il faut alors passer par Selenium.
+    """
+    try:
+        resp = _http.get(url, timeout=timeout)
+        resp.raise_for_status()
+    except Exception as e:
+        print(f"[odds] HTTP indisponible pour {url}: {e}")
+        _overview_etags.pop(url, None)
+        return None
+
+    base_depth = len([p for p in urlsplit(url).path.split("/") if p])
+    stubs = []
+    seen = set()
+    for href, inner in _LINK_RE.findall(resp.text):
+        parts = [p for p in href.split("/") if p]
+        if len(parts) != base_depth + 1:
+            continue
+        slug = parts[-1]
+        if "-" not in slug or len(slug) < 5 or "results" in href or "archive" in href:
+            continue
+        names = _stub_names(inner)
+        if len(names) < 2:
+            continue
+        key = (names[0], names[1])
+        if key in seen:
+            continue
+        seen.add(key)
+        stubs.append({"home": names[0], "away": names[1], "match_url": _ODDSPORTAL_BASE + href})
+
+    # L'ETag ne couvre la liste des matchs que si elle est dans le HTML serveur :
+    # avec le repli Selenium, il ne decrit que la coquille statique de la page
+    etag = resp.headers.get("ETag")
+    if stubs and etag:
+        _overview_etags[url] = (etag, time.time())
+    else:
+        _overview_etags.pop(url, None)
+    return stubs or None
+
+
 def _extract_match_stubs(driver, url):
     """
     Scrape la page overview Oddsportal pour recuperer la liste des matchs.
@@ -77,18 +327,30 @@ def _extract_match_stubs(driver, url):
     Note : Oddsportal N'utilise PAS /match/ dans ses URLs.
     Les matchs ont la forme /sport/pays/ligue/equipe1-equipe2-matchid/
     soit exactement UN segment de plus que la page ligue courante.
+
+    Le HTML serveur est tente d'abord (requete HTTP simple) ; Selenium
+    n'est utilise que si la liste des matchs n'y figure pas.
     """
+    stubs = _extract_match_stubs_http(url)
+    if stubs:
+        print(f"[odds] Overview {url.split('/')[-2] or url}: {len(stubs)} matchs trouves (HTTP)")
+        return stubs
+
+    if driver is None:
+        return []
+
     try:
-        driver.get(url)
-        time.sleep(7)  # Laisser React/JS rendre le contenu
+        _get_page(driver, url)
+        _wait_ready(driver, _OVERVIEW_READY_JS, 7)  # Laisser React/JS rendre le contenu
 
         title = driver.execute_script("return document.title")
         print(f"[odds] Page chargee: {title[:70] if title else 'N/A'}")
 
-        stubs = driver.execute_script('''
-            const results = [];
+        columns = driver.execute_script('''
+            // Colonnes paralleles (homes, aways, hrefs) plutot qu'un objet par
+            // match : payload plus leger, decode en un seul zip cote Python
+            const homes = [], aways = [], hrefs = [];
             const seen = new Set();
-            const BASE = "https://www.oddsportal.com";
 
             // Profondeur de la page courante (ex: /football/england/premier-league/ = 3)
             const baseParts = window.location.pathname.split("/").filter(Boolean);
@@ -98,6 +360,12 @@ def _extract_match_stubs(driver, url):
             // Ex: /football/england/premier-league/arsenal-chelsea-xAb123/ = profondeur 4
             const links = document.querySelectorAll("a[href]");
 
+            // Filtres compiles une fois, hors de la boucle sur les liens
+            const URL_SKIP = /results|archive/;
+            // Heures, scores et cotes (les decimaux en font partie) : non-noms
+            const NUM_ONLY = /^[\\d:.+\\-\\/]+$/;
+            const SKIP = new Set(["X", "1", "2", "Draw", "Nul", "N/A", "-", "+"]);
+
             links.forEach(link => {
                 const href = link.getAttribute("href");
                 if (!href || !href.startsWith("/") || href.includes("#")) return;
@@ -109,7 +377,7 @@ def _extract_match_stubs(driver, url):
                 const slug = parts[parts.length - 1];
                 if (!slug.includes("-") || slug.length < 5) return;
                 // Eviter les liens vers des archives ou resultats
-                if (href.includes("results") || href.includes("archive")) return;
+                if (URL_SKIP.test(href)) return;
 
                 // Remonter dans le DOM pour trouver la ligne du match
                 let container = link;
@@ -122,36 +390,37 @@ def _extract_match_stubs(driver, url):
                 }
 
                 const text = container.innerText || link.innerText || "";
-                const lines = text.split("\\n")
-                    .map(s => s.trim())
-                    .filter(s => s.length > 2);
-
-                // Garder uniquement les lignes qui ressemblent a des noms d'equipes
-                const SKIP = new Set(["X", "1", "2", "Draw", "Nul", "N/A", "-", "+"]);
-                const names = lines.filter(l =>
-                    !SKIP.has(l) &&
-                    !/^[\\d:.+\\-\\/]+$/.test(l) &&
-                    !/^\\d+\\.\\d+$/.test(l) &&
-                    l.length > 2 && l.length < 60
-                );
+
+                // Un seul passage sur les lignes : garder celles qui ressemblent
+                // a des noms d'equipes, arret des les deux premieres trouvees
+                const names = [];
+                for (const raw of text.split("\\n")) {
+                    const l = raw.trim();
+                    if (l.length > 2 && l.length < 60 && !SKIP.has(l) && !NUM_ONLY.test(l)) {
+                        names.push(l);
+                        if (names.length === 2) break;
+                    }
+                }
 
                 if (names.length >= 2) {
                     const key = names[0] + "||" + names[1];
                     if (!seen.has(key)) {
                         seen.add(key);
-                        results.push({
-                            home: names[0],
-                            away: names[1],
-                            match_url: BASE + href
-                        });
+                        homes.push(names[0]);
+                        aways.push(names[1]);
+                        hrefs.push(href);
                     }
                 }
             });
 
-            return results;
+            return [homes, aways, hrefs];
         ''')
 
-        stubs = stubs or []
+        homes, aways, hrefs = columns or ([], [], [])
+        stubs = [
+            {"home": h, "away": a, "match_url": _ODDSPORTAL_BASE + href}
+            for h, a, href in zip(homes, aways, hrefs)
+        ]
         print(f"[odds] Overview {url.split('/')[-2] or url}: {len(stubs)} matchs trouves")
         return stubs
 
@@ -160,12 +429,29 @@ def _extract_match_stubs(driver, url):
         return []
 
 
+def _overview_unchanged(url, now, timeout=5):
+    """Vrai si l'overview n'a pas change depuis le dernier scrape (ETag, requete conditionnelle)."""
+    etag, scraped_at = _overview_etags.get(url, (None, 0))
+    if not etag or now - scraped_at >= STUB_MAX_AGE:
+        return False
+    try:
+        resp = _http.head(url, headers={"If-None-Match": etag}, timeout=timeout, allow_redirects=True)
+    except Exception:
+        return False
+    return resp.status_code == 304 or resp.headers.get("ETag") == etag
+
+
 def _get_match_stubs(driver, url):
     """Retourne les stubs depuis le cache ou en les scrapant."""
     now = time.time()
     if url in _match_stub_cache and (now - _match_stub_cache_ts.get(url, 0)) < STUB_CACHE_TTL:
         return _match_stub_cache[url]
 
+    # Stubs expires mais page identique : on les garde sans re-scraper
+    if _match_stub_cache.get(url) and _overview_unchanged(url, now):
+        _match_stub_cache_ts[url] = now
+        return _match_stub_cache[url]
+
     stubs = _extract_match_stubs(driver, url)
     _match_stub_cache[url] = stubs
     _match_stub_cache_ts[url] = now
@@ -174,6 +460,193 @@ def _get_match_stubs(driver, url):
 
 # ── Phase 2 : extraction des cotes Pinnacle depuis la page du match ──
 
+OU_THRESHOLDS = (1.5, 2.5, 3.5)
+
+# Fragments d'URL des onglets de marche d'une page de match
+_MARKET_FRAGMENTS = {"over_under": "#over-under;2", "btts": "#bts;2"}
+
+# Cherche dans le DOM les lignes d'un bookmaker sharp et renvoie la plus
+# fiable : { book, priority, odds } ou null. arguments[0] (mode) :
+#   ""      : lecture de toutes les lignes candidates
+#   "mark"  : memorise le texte des lignes presentes (data-ev-seen), renvoie null
+#   "fresh" : lecture en ignorant les lignes marquees dont le texte n'a pas change
+_SHARP_ROWS_JS = '''
+    const mode = arguments[0] || "";
+    const SHARP_BOOKS = ["Pinnacle", "Betfair"];
+    const PRIORITY = {"Pinnacle": 0, "Betfair": 1};
+    const BOOKS_LOWER = SHARP_BOOKS.map(b => b.toLowerCase());
+    const ODDS_LINE = /^\\d+\\.\\d{2}$/;  // compile une fois, hors des boucles
+    const found = [];
+
+    // Chercher dans le DOM les lignes contenant un bookmaker sharp
+    const selectors = [
+        "div[class*='border-b']",
+        "tr",
+        "div[class*='flex'][class*='items']",
+        "div[class*='bookmaker']",
+        "div[class*='odd-']",
+        "div[class*='table-row']",
+    ];
+    const ROW_SEL = selectors.join(", ");
+
+    // Lignes ciblees : l'ancetre "ligne" le plus proche de chaque logo / lien
+    // sharp. innerText force un calcul de layout par noeud, on evite donc de
+    // le lire sur chaque flexbox de la page ; scan large seulement a defaut.
+    const narrowed = new Set();
+    for (const el of document.querySelectorAll(
+        "img[alt*='pinnacle' i], img[src*='pinnacle' i], a[href*='pinnacle' i], " +
+        "img[alt*='betfair' i], img[src*='betfair' i], a[href*='betfair' i]"
+    )) {
+        const row = el.closest(ROW_SEL);
+        if (row) narrowed.add(row);
+    }
+    const allRows = narrowed.size ? narrowed : document.querySelectorAll(ROW_SEL);
+
+    if (mode === "mark") {
+        for (const row of allRows) row.dataset.evSeen = row.innerText || "";
+        return null;
+    }
+
+    for (const row of allRows) {
+        const text = row.innerText || "";
+        if (mode === "fresh" && row.dataset.evSeen === text) continue;
+        const imgs = Array.from(row.querySelectorAll("img"));
+
+        for (let b = 0; b < SHARP_BOOKS.length; b++) {
+            const book = SHARP_BOOKS[b];
+            const bookLower = BOOKS_LOWER[b];
+            const hasText = text.includes(book);
+            const hasImg = imgs.some(img =>
+                (img.alt || "").toLowerCase().includes(bookLower) ||
+                (img.src || "").toLowerCase().includes(bookLower)
+            );
+
+            if (!hasText && !hasImg) continue;
+
+            // Extraire tous les decimaux de cette ligne (un seul passage)
+            const allNums = [];
+            for (const raw of text.split("\\n")) {
+                const s = raw.trim();
+                if (!ODDS_LINE.test(s)) continue;
+                const n = parseFloat(s);
+                if (n > 1.01 && n < 50) allNums.push(n);
+            }
+
+            if (allNums.length >= 2) {
+                // Prendre les 2 ou 3 derniers (cotes courantes, pas cotes d'ouverture)
+                const odds = allNums.length >= 3 ? allNums.slice(-3) : allNums.slice(-2);
+                // Pinnacle est la meilleure source : inutile de scanner la suite
+                if (PRIORITY[book] === 0) return {book: book, priority: 0, odds: odds};
+                found.push({
+                    book: book,
+                    priority: PRIORITY[book],
+                    odds: odds
+                });
+            }
+        }
+    }
+
+    // Retourner la source la plus fiable (priorite la plus basse = meilleur)
+    found.sort((a, b) => a.priority - b.priority);
+    return found.length ? found[0] : null;
+'''
+
+
+# Appel de l'extracteur pre-installe ; "missing" si le document ne l'a pas
+_CALL_SHARP_ROWS_JS = '''
+    if (typeof window.__evSharpRows !== "function") return "missing";
+    return window.__evSharpRows(arguments[0]);
+'''
+
+
+def _sharp_rows(driver, mode=""):
+    """
+    Lignes sharp de la page courante (script pre-installe, sinon envoye en
+    entier). mode : voir _SHARP_ROWS_JS.
+    """
+    result = driver.execute_script(_CALL_SHARP_ROWS_JS, mode)
+    if result == "missing":
+        result = driver.execute_script(_SHARP_ROWS_JS, mode)
+    return result
+
+
+# Action en page (clic sur un libelle ou changement de fragment) puis attente
+# evenementielle du re-rendu : la promesse (callback async) est resolue des
+# que le DOM est calme depuis RENDER_QUIET_MS apres au moins une mutation, au
+# plus tard apres arguments[2] ms. Script constant, parametres via arguments[].
+RENDER_QUIET_MS = 150
+
+_ACT_AND_AWAIT_JS = '''
+    const action = arguments[0], value = arguments[1], timeoutMs = arguments[2];
+    const quietMs = arguments[3], done = arguments[arguments.length - 1];
+    let quiet = null;
+    const obs = new MutationObserver(() => {
+        clearTimeout(quiet);
+        quiet = setTimeout(() => finish(true), quietMs);
+    });
+    const cap = setTimeout(() => finish(false), timeoutMs);
+    function finish(changed) {
+        obs.disconnect();
+        clearTimeout(quiet);
+        clearTimeout(cap);
+        done(changed);
+    }
+    obs.observe(document.body, {childList: true, subtree: true, characterData: true});
+
+    if (action === "hash") {
+        location.hash = value;
+        return;
+    }
+    const target = Array.from(document.querySelectorAll(
+        'button, [role="tab"], [class*="tab"], [class*="filter"], ' +
+        '[class*="btn"], a, li, span'
+    )).find(el => el.children.length === 0 && el.innerText.trim() === value);
+    if (!target) {
+        finish(false);
+        return;
+    }
+    target.click();
+'''
+
+
+def _act_and_await(driver, action, value, timeout):
+    """Execute l'action ("click" sur un libelle ou "hash") et attend le re-rendu (timeout en s)."""
+    try:
+        driver.execute_async_script(
+            _ACT_AND_AWAIT_JS, action, value, int(timeout * 1000), RENDER_QUIET_MS
+        )
+    except Exception:
+        pass
+
+
+def _switch_tab(driver, market):
+    """Passe sur l'onglet du marche (fragment, rendu cote client) et attend son rendu."""
+    _act_and_await(driver, "hash", _MARKET_FRAGMENTS[market], 2)
+
+
+def _click_threshold(driver, threshold):
+    """Selectionne le seuil O/U (1.5, 2.5...) dans l'onglet over-under."""
+    _act_and_await(driver, "click", str(threshold), 1.5)
+
+
+def _cache_sharp(key, result):
+    now = time.time()
+    if len(_sharp_cache) > 5000:
+        # Purge des matchs passes (les URLs changent d'un jour a l'autre)
+        for k, (_, ts) in list(_sharp_cache.items()):
+            if now - ts >= STUB_CACHE_TTL:
+                _sharp_cache.pop(k, None)
+    _sharp_cache[key] = (result, now)
+
+
+def _cached_sharp(key):
+    """(True, resultat) si la cle est en cache et fraiche, sinon (False, None)."""
+    cached = _sharp_cache.get(key)
+    if cached and (time.time() - cached[1]) < STUB_CACHE_TTL:
+        return True, cached[0]
+    return False, None
+
+
 def _scrape_sharp_odds_from_match_page(driver, match_url, market="h2h", threshold=None):
     """
     Navigue vers la page individuelle du match et extrait les cotes
@@ -183,91 +656,28 @@ def _scrape_sharp_odds_from_match_page(driver, match_url, market="h2h", threshol
     threshold : pour over_under, le seuil (1.5, 2.5, 3.5)
 
     Retourne { book: str, odds: [float, ...] } ou None si aucun book sharp trouve.
+    Resultat mis en cache STUB_CACHE_TTL secondes (sauf erreur de chargement).
     """
+    key = (match_url, market, threshold)
+    hit, result = _cached_sharp(key)
+    if hit:
+        return result
+
     # Construire l'URL avec le bon fragment
-    if market == "over_under":
-        nav_url = match_url.rstrip("/") + "/#over-under;2"
-    elif market == "btts":
-        nav_url = match_url.rstrip("/") + "/#bts;2"
-    else:
-        nav_url = match_url
+    nav_url = match_url
+    if market in _MARKET_FRAGMENTS:
+        nav_url = match_url.rstrip("/") + "/" + _MARKET_FRAGMENTS[market]
 
     try:
-        driver.get(nav_url)
-        time.sleep(4)
+        _get_page(driver, nav_url)
+        _wait_ready(driver, _SHARP_READY_JS, 4)
 
         # Pour O/U, cliquer sur le bon seuil
         if market == "over_under" and threshold:
-            threshold_label = str(threshold)
-            try:
-                driver.execute_script(f"""
-                    const label = '{threshold_label}';
-                    const candidates = Array.from(document.querySelectorAll(
-                        'button, [role="tab"], [class*="tab"], [class*="filter"], ' +
-                        '[class*="btn"], a, li, span'
-                    ));
-                    const target = candidates.find(el =>
-                        el.children.length === 0 && el.innerText.trim() === label
-                    );
-                    if (target) target.click();
-                """)
-                time.sleep(1.5)
-            except Exception:
-                pass
-
-        result = driver.execute_script('''
-            const SHARP_BOOKS = ["Pinnacle", "Betfair"];
-            const PRIORITY = {"Pinnacle": 0, "Betfair": 1};
-            const found = [];
-
-            // Chercher dans le DOM les lignes contenant un bookmaker sharp
-            const selectors = [
-                "div[class*='border-b']",
-                "tr",
-                "div[class*='flex'][class*='items']",
-                "div[class*='bookmaker']",
-                "div[class*='odd-']",
-                "div[class*='table-row']",
-            ];
-            const allRows = document.querySelectorAll(selectors.join(", "));
-
-            for (const row of allRows) {
-                const text = row.innerText || "";
-                const imgs = Array.from(row.querySelectorAll("img"));
-
-                for (const book of SHARP_BOOKS) {
-                    const hasText = text.includes(book);
-                    const hasImg = imgs.some(img =>
-                        (img.alt || "").toLowerCase().includes(book.toLowerCase()) ||
-                        (img.src || "").toLowerCase().includes(book.toLowerCase())
-                    );
-
-                    if (!hasText && !hasImg) continue;
-
-                    // Extraire tous les decimaux de cette ligne
-                    const allNums = text.split("\\n")
-                        .map(s => s.trim())
-                        .filter(s => /^\\d+\\.\\d{2}$/.test(s))
-                        .map(parseFloat)
-                        .filter(n => n > 1.01 && n < 50);
-
-                    if (allNums.length >= 2) {
-                        // Prendre les 2 ou 3 derniers (cotes courantes, pas cotes d'ouverture)
-                        const odds = allNums.length >= 3 ? allNums.slice(-3) : allNums.slice(-2);
-                        found.push({
-                            book: book,
-                            priority: PRIORITY[book],
-                            odds: odds
-                        });
-                    }
-                }
-            }
-
-            // Retourner la source la plus fiable (priorite la plus basse = meilleur)
-            found.sort((a, b) => a.priority - b.priority);
-            return found.length ? found[0] : null;
-        ''')
+            _click_threshold(driver, threshold)
 
+        result = _sharp_rows(driver)
+        _cache_sharp(key, result)
         return result  # { book: "Pinnacle", odds: [...] } or None
 
     except Exception as e:
@@ -275,102 +685,228 @@ def _scrape_sharp_odds_from_match_page(driver, match_url, market="h2h", threshol
         return None
 
 
+FOOTBALL_MARKETS = ("h2h", "over_under", "btts")
+
+
+def _ou_labels(t):
+    """(noms des outcomes, cle de marche) d'un seuil O/U."""
+    return (f"Over {t}", f"Under {t}"), f"over_under_{t}"
+
+
+# Libelles O/U precalcules par seuil (pas de f-string par event)
+_OU_LABELS = {t: _ou_labels(t) for t in OU_THRESHOLDS}
+
+
+def _sharp_keys(match_url, markets):
+    """Cles de _sharp_cache des marches demandes (un par seuil pour O/U)."""
+    keys = []
+    for market in markets:
+        if market == "over_under":
+            keys += [(match_url, "over_under", t) for t in OU_THRESHOLDS]
+        else:
+            keys.append((match_url, market, None))
+    return keys
+
+
+def _scrape_all_sharp_odds(driver, match_url, markets=FOOTBALL_MARKETS):
+    """
+    Un seul chargement de la page du match pour les marches foot demandes :
+    H2H sur la page, puis O/U et BTTS en changeant d'onglet (fragment,
+    rendu cote client, sans recharger la page).
+
+    Retourne {"h2h": r, "over_under": {1.5: r, 2.5: r, 3.5: r}, "btts": r}
+    restreint aux marches demandes (r au format de
+    _scrape_sharp_odds_from_match_page), ou None si la page n'a pas pu
+    etre chargee.
+    """
+    keys = _sharp_keys(match_url, markets)
+    cached = [_cached_sharp(k) for k in keys]
+    if all(hit for hit, _ in cached):
+        results = {k: r for k, (_, r) in zip(keys, cached)}
+    else:
+        results = {}
+        try:
+            _get_page(driver, match_url)
+            _wait_ready(driver, _SHARP_READY_JS, 4)
+            if "h2h" in markets:
+                results[(match_url, "h2h", None)] = _sharp_rows(driver)
+
+            if "over_under" in markets:
+                _switch_tab(driver, "over_under")
+                for t in OU_THRESHOLDS:
+                    # Les blocs des seuils deja ouverts restent dans le DOM : leurs
+                    # lignes sont marquees avant le clic et ignorees a la lecture
+                    _sharp_rows(driver, "mark")
+                    _click_threshold(driver, t)
+                    results[(match_url, "over_under", t)] = _sharp_rows(driver, "fresh")
+
+            if "btts" in markets:
+                _switch_tab(driver, "btts")
+                results[(match_url, "btts", None)] = _sharp_rows(driver)
+        except Exception as e:
+            print(f"[odds] Erreur match page {match_url}: {e}")
+            return None
+        for k, r in results.items():
+            _cache_sharp(k, r)
+
+    by_market = {}
+    for (_, market, t), r in results.items():
+        if market == "over_under":
+            by_market.setdefault("over_under", {})[t] = r
+        else:
+            by_market[market] = r
+    return by_market
+
+
 # ── Construction des events a partir des stubs ──
 
-def _build_events_from_stubs(stubs, sport_name, market="h2h", threshold=None):
+def _scrape_stubs_parallel(driver, stubs, fetch):
+    """
+    Applique fetch(driver, stub) a chaque stub (ou URL d'overview), en parallele sur le driver de
+    l'appelant + les drivers libres du pool (empruntes sans bloquer : les
+    autres sports en cours gardent les leurs, pas d'interblocage).
+    Retourne les resultats dans l'ordre des stubs.
+    """
+    extra = []
+    while len(extra) < min(len(stubs), DRIVER_POOL_SIZE) - 1:
+        d = acquire_driver(block=False)
+        if d is None:
+            break
+        extra.append(d)
+
+    idle = queue.Queue()
+    last_used = {}
+    for d in [driver] + extra:
+        idle.put(d)
+
+    def scrape(stub):
+        d = idle.get()
+        try:
+            # Delai poli par driver (et non global)
+            wait = MATCH_PAGE_DELAY - (time.time() - last_used.get(id(d), 0))
+            if wait > 0:
+                time.sleep(wait)
+            return fetch(d, stub)
+        except Exception as e:
+            label = (f"{stub.get('home','?')} vs {stub.get('away','?')}"
+                     if isinstance(stub, dict) else stub)
+            print(f"[odds] Erreur stub {label}: {e}")
+            return None
+        finally:
+            last_used[id(d)] = time.time()
+            idle.put(d)
+
+    try:
+        if not extra:
+            return [scrape(stub) for stub in stubs]
+        with ThreadPoolExecutor(max_workers=1 + len(extra)) as executor:
+            return list(executor.map(scrape, stubs))
+    finally:
+        for d in extra:
+            release_driver(d)
+
+
+def _event_from_sharp(stub, result, sport_name, market, threshold=None):
+    """Construit l'event de reference d'un stub a partir des cotes sharp (ou None)."""
+    raw_odds = result["odds"]
+    ref_source = result["book"].lower().replace(" ", "_") + "_via_oddsportal"
+
+    # Sanity check : la marge totale doit etre proche de celle de Pinnacle (~2%)
+    # Si elle depasse 6%, on a probablement capture un book soft par erreur
+    total_implied = sum(1.0 / o for o in raw_odds if o > 1.0)
+    if not (0.97 <= total_implied <= 1.06):
+        print(f"[odds] Marge suspecte {total_implied:.3f} "
+              f"({stub['home']} vs {stub['away']}, {market}) — ignore")
+        return None
+
+    home = stub["home"]
+    away = stub["away"]
+
+    # Noms des outcomes selon le marche (alignes sur raw_odds)
+    if market == "h2h":
+        names = (home, "Draw", away) if len(raw_odds) == 3 else (home, away)
+        market_key = "h2h"
+    elif market == "over_under":
+        t = threshold or 2.5
+        names, market_key = _OU_LABELS.get(t) or _ou_labels(t)
+    elif market == "btts":
+        names = ("Oui", "Non")
+        market_key = "btts"
+    else:
+        return None
+
+    # Validation sur les cotes brutes : les dicts ne sont construits que
+    # pour les events retenus
+    pairs = [(n, o) for n, o in zip(names, raw_odds) if o > 1.01]
+    if len(pairs) < 2:
+        return None
+    valid = [{"name": n, "odds": o} for n, o in pairs]
+
+    event = {
+        "event_id": "",
+        "sport_title": sport_name,
+        "home_team": home,
+        "away_team": away,
+        "commence_time": "",
+        "market": market_key,
+        "market_type": market,
+        "market_threshold": threshold if market == "over_under" else None,
+        "num_books": 1,
+        "source": ref_source,
+        "outcomes": valid,
+    }
+
+    book_label = result["book"]
+    t_label = f" {threshold}" if market == "over_under" else ""
+    print(f"[odds] {book_label} ({market}{t_label}): {home} vs {away}")
+    return event
+
+
+def _build_events_from_stubs(driver, stubs, sport_name, market="h2h", threshold=None):
     """
     Pour chaque stub (home, away, match_url), visite la page du match
     et extrait les cotes Pinnacle pour le marche demande.
     """
-    driver = _get_driver()
-    if not driver:
-        return []
+    def fetch(d, stub):
+        return _scrape_sharp_odds_from_match_page(
+            d, stub["match_url"], market=market, threshold=threshold
+        )
 
     events = []
-    for stub in stubs:
-        time.sleep(1.2)  # delai poli entre les requetes
-        try:
-            result = _scrape_sharp_odds_from_match_page(
-                driver, stub["match_url"], market=market, threshold=threshold
-            )
-
-            if not result:
-                continue
-
-            raw_odds = result["odds"]
-            ref_source = result["book"].lower().replace(" ", "_") + "_via_oddsportal"
-
-            # Sanity check : la marge totale doit etre proche de celle de Pinnacle (~2%)
-            # Si elle depasse 6%, on a probablement capture un book soft par erreur
-            total_implied = sum(1.0 / o for o in raw_odds if o > 1.0)
-            if not (0.97 <= total_implied <= 1.06):
-                print(f"[odds] Marge suspecte {total_implied:.3f} "
-                      f"({stub['home']} vs {stub['away']}, {market}) — ignore")
-                continue
-
-            home = stub["home"]
-            away = stub["away"]
-
-            # Construire les outcomes selon le marche
-            if market == "h2h":
-                if len(raw_odds) == 3:
-                    outcomes = [
-                        {"name": home, "odds": raw_odds[0]},
-                        {"name": "Draw", "odds": raw_odds[1]},
-                        {"name": away, "odds": raw_odds[2]},
-                    ]
-                else:
-                    outcomes = [
-                        {"name": home, "odds": raw_odds[0]},
-                        {"name": away, "odds": raw_odds[1]},
-                    ]
-                market_key = "h2h"
-
-            elif market == "over_under":
-                t = threshold or 2.5
-                outcomes = [
-                    {"name": f"Over {t}", "odds": raw_odds[0]},
-                    {"name": f"Under {t}", "odds": raw_odds[1]},
-                ]
-                market_key = f"over_under_{t}"
-
-            elif market == "btts":
-                outcomes = [
-                    {"name": "Oui", "odds": raw_odds[0]},
-                    {"name": "Non", "odds": raw_odds[1]},
-                ]
-                market_key = "btts"
-
-            else:
-                continue
-
-            valid = [o for o in outcomes if o["odds"] > 1.01]
-            if len(valid) < 2:
-                continue
-
-            event = {
-                "event_id": "",
-                "sport_title": sport_name,
-                "home_team": home,
-                "away_team": away,
-                "commence_time": "",
-                "market": market_key,
-                "market_type": market,
-                "market_threshold": threshold if market == "over_under" else None,
-                "num_books": 1,
-                "source": ref_source,
-                "outcomes": valid,
-            }
+    for stub, result in zip(stubs, _scrape_stubs_parallel(driver, stubs, fetch)):
+        if result:
+            event = _event_from_sharp(stub, result, sport_name, market, threshold)
+            if event:
+                events.append(event)
+    return events
 
-            events.append(event)
-            book_label = result["book"]
-            t_label = f" {threshold}" if market == "over_under" else ""
-            print(f"[odds] {book_label} ({market}{t_label}): {home} vs {away}")
 
-        except Exception as e:
-            print(f"[odds] Erreur stub {stub.get('home','?')} vs {stub.get('away','?')}: {e}")
+def _build_all_market_events(driver, stubs, sport_name, markets=FOOTBALL_MARKETS):
+    """
+    Variante multi-marches (foot) : une seule visite par match
+    (_scrape_all_sharp_odds), repartie ensuite par marche.
+    Retourne {"h2h": [...], "over_under": {seuil: [...]}, "btts": [...]}
+    restreint aux marches demandes.
+    """
+    def fetch(d, stub):
+        return _scrape_all_sharp_odds(d, stub["match_url"], markets)
 
-    return events
+    by_market = {m: ({t: [] for t in OU_THRESHOLDS} if m == "over_under" else [])
+                 for m in markets}
+    for stub, results in zip(stubs, _scrape_stubs_parallel(driver, stubs, fetch)):
+        if not results:
+            continue
+        for market in ("h2h", "btts"):
+            if results.get(market):
+                event = _event_from_sharp(stub, results[market], sport_name, market)
+                if event:
+                    by_market[market].append(event)
+        for t, result in results.get("over_under", {}).items():
+            if result:
+                event = _event_from_sharp(stub, result, sport_name, "over_under", t)
+                if event:
+                    by_market["over_under"][t].append(event)
+    return by_market
 
 
 # URLs Oddsportal par sport
@@ -408,6 +944,13 @@ ODDSPORTAL_URLS = {
 }
 
 
+# Marches scrapables par sport, fixes a l'import : O/U et BTTS en foot seulement
+_SPORT_MARKETS = {
+    key: FOOTBALL_MARKETS if key == "soccer" else ("h2h",)
+    for key in ODDSPORTAL_URLS
+}
+
+
 def get_available_sports():
     """Liste des sports disponibles."""
     return [
@@ -416,12 +959,15 @@ def get_available_sports():
     ]
 
 
-def get_reference_odds(sport_key, markets="h2h"):
+def get_reference_odds(sport_key, markets="h2h", driver=None, cache_ttl=REFERENCE_CACHE_TTL):
     """
     Recupere les cotes de reference Pinnacle pour un sport.
     Phase 1 : overview pages pour les URLs de matchs (avec cache)
     Phase 2 : pages individuelles pour les cotes Pinnacle specifiques
     markets : "h2h", "over_under", "btts" ou "all"
+    driver  : driver Selenium a utiliser ; par defaut un driver est
+              emprunte au pool le temps de l'appel
+    cache_ttl : duree de vie (s) du resultat en memoire ; 0 pour forcer le scraping
     """
     base_key = sport_key
     if base_key not in ODDSPORTAL_URLS:
@@ -429,40 +975,71 @@ def get_reference_odds(sport_key, markets="h2h"):
     if base_key not in ODDSPORTAL_URLS:
         return []
 
+    key = (base_key, markets)
+    entry = _reference_cache.get(key)
+    if entry and time.time() - entry[1] < cache_ttl:
+        return entry[0]
+
     sport_name, urls = ODDSPORTAL_URLS[base_key]
-    driver = _get_driver()
-    if not driver:
-        return []
+    if driver is not None:
+        events = _scrape_reference_odds(driver, base_key, sport_name, urls, markets)
+    else:
+        driver = acquire_driver()
+        if not driver:
+            return []
+        try:
+            events = _scrape_reference_odds(driver, base_key, sport_name, urls, markets)
+        finally:
+            release_driver(driver)
 
-    all_events = []
+    # Les echecs (liste vide) ne sont pas memorises
+    if events:
+        _reference_cache[key] = (events, time.time())
+    return events
 
-    for url in urls:
-        # Phase 1 : recuperer les stubs (cache partage entre tous les marches)
-        stubs = _get_match_stubs(driver, url)
-        if not stubs:
-            continue
 
-        # H2H
-        if markets in ("h2h", "all"):
-            events = _build_events_from_stubs(stubs, sport_name, market="h2h")
-            all_events.extend(events)
-            print(f"[odds] {sport_name} H2H: {len(events)} events avec cotes sharp")
-
-        # Over/Under 1.5 / 2.5 / 3.5 (football seulement)
-        if markets in ("over_under", "all") and base_key == "soccer":
-            for threshold in [1.5, 2.5, 3.5]:
-                events = _build_events_from_stubs(
-                    stubs, sport_name, market="over_under", threshold=threshold
-                )
-                all_events.extend(events)
-                print(f"[odds] {sport_name} O/U{threshold}: {len(events)} events")
-
-        # BTTS (football seulement)
-        if markets in ("btts", "all") and base_key == "soccer":
-            events = _build_events_from_stubs(stubs, sport_name, market="btts")
-            all_events.extend(events)
-            print(f"[odds] {sport_name} BTTS: {len(events)} events")
+def _scrape_reference_odds(driver, base_key, sport_name, urls, markets):
+    """
+    Corps de get_reference_odds, sur un driver deja obtenu.
+    Les overviews de toutes les ligues sont chargees en parallele, puis les
+    pages de match de toutes les ligues forment un seul lot par marche
+    (les drivers du pool restent occupes jusqu'au dernier match).
+    """
+    supported = _SPORT_MARKETS[base_key]
+    wanted = supported if markets == "all" else tuple(m for m in supported if m == markets)
+    if not wanted:
+        return []
 
+    # Phase 1 : recuperer les stubs (cache partage entre tous les marches)
+    stubs = []
+    seen = set()
+    for url_stubs in _scrape_stubs_parallel(driver, list(urls), _get_match_stubs):
+        for stub in url_stubs or ():
+            if stub["match_url"] not in seen:
+                seen.add(stub["match_url"])
+                stubs.append(stub)
+    if not stubs:
+        return []
+
+    # H2H seul : page du match sans changement d'onglet
+    if wanted == ("h2h",):
+        events = _build_events_from_stubs(driver, stubs, sport_name, market="h2h")
+        print(f"[odds] {sport_name} H2H: {len(events)} events avec cotes sharp")
+        return events
+
+    # O/U et BTTS (football seulement) : une seule visite par match pour
+    # tous les marches demandes, y compris les trois seuils O/U
+    all_events = []
+    by_market = _build_all_market_events(driver, stubs, sport_name, wanted)
+    if "h2h" in by_market:
+        all_events.extend(by_market["h2h"])
+        print(f"[odds] {sport_name} H2H: {len(by_market['h2h'])} events avec cotes sharp")
+    for threshold, events in by_market.get("over_under", {}).items():
+        all_events.extend(events)
+        print(f"[odds] {sport_name} O/U{threshold}: {len(events)} events")
+    if "btts" in by_market:
+        all_events.extend(by_market["btts"])
+        print(f"[odds] {sport_name} BTTS: {len(by_market['btts'])} events")
     return all_events
 
 
@@ -477,11 +1054,14 @@ def get_all_reference_odds():
 
 
 def cleanup():
-    """Ferme le driver Chrome."""
-    global _driver
-    if _driver:
+    """Ferme les drivers Chrome inactifs du pool."""
+    for _ in range(_driver_pool.qsize()):
         try:
-            _driver.quit()
-        except Exception:
-            pass
-        _driver = None
+            slot = _driver_pool.get_nowait()
+        except queue.Empty:
+            break
+        if slot["driver"] is not None:
+            _quit_driver(slot["driver"])
+        slot["driver"] = None
+        slot["uses"] = 0
+        _driver_pool.put(slot)
@@ -5,12 +5,24 @@ puis extrait le PRELOADED_STATE depuis le HTML rendu.
 Fallback sur The Odds API si Selenium echoue.
 """
 
+import functools
 import json
+import os
+import queue
 import re
+import threading
 import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+
+import orjson
 import requests
+from rapidfuzz import fuzz
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from config import ODDS_API_KEY, ODDS_API_BASE, ODDS_API_REGIONS
+from chromedriver import get_chromedriver_path
+from config import ODDS_API_KEY, ODDS_API_BASE, ODDS_API_REGIONS, WINAMAX_WORKERS
 
 # Mapping des sports Winamax (IDs reels confirmes par scraping)
 # ID Winamax -> (nom afiche, cle The Odds API)
@@ -32,54 +44,91 @@ WINAMAX_SPORTS = {
     30: ("Esport", "esports"),
 }
 
-# ── Selenium Chrome Driver ──
+# ── Motifs compiles une fois ──
+
+# Debut du PRELOADED_STATE : l'objet lui-meme est delimite par le decodeur json
+_RE_PRELOADED_START = re.compile(r'PRELOADED_STATE\s*=\s*(?=\{)')
+_JSON_DECODER = json.JSONDecoder()
+_RE_VS = re.compile(r'\s+vs\.?\s+', re.IGNORECASE)
+_RE_OU_NUM = re.compile(r'(\d+[.,]\d+)')
+# Prefixes/suffixes de club retires en une passe (au lieu d'un re.sub par mot)
+_RE_CLUB_PREFIX = re.compile(r'\b(?:fc|ac|as|sc|us|ss|rc|og|afc|cf|cd)\b')
+_RE_SPACES = re.compile(r'\s+')
+# Mots-cles de _detect_market_type : une alternance compilee par categorie
+# (un seul scan du texte au lieu d'un "kw in joined" par mot-cle)
+# Over/Under : "plus de 2.5", "moins de 2.5", "over 2.5", "under 1.5"
+_OU_KEYWORDS = ("plus de", "moins de", "over", "under", "+2.", "+1.", "+3.", "-2.", "-1.", "-3.")
+# BTTS : "les deux equipes marquent", "both teams to score"
+_BTTS_KEYWORDS = ("deux equipes", "both teams", "btts", "les 2 equipes", "marquent")
+_RE_OU_KW = re.compile("|".join(map(re.escape, _OU_KEYWORDS)))
+_RE_BTTS_KW = re.compile("|".join(map(re.escape, _BTTS_KEYWORDS)))
+
+
+# ── Session HTTP partagee ──
+# Keep-alive + pool de connexions urllib3 : evite un handshake TLS par requete.
+# Utilisee en priorite quand la page embarque deja le PRELOADED_STATE cote serveur,
+# ainsi que pour ESPN (ESPN_WORKERS requetes concurrentes) et The Odds API.
+
+_http = requests.Session()
+_http.headers.update({
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
+    ),
+    "Accept-Language": "fr-FR,fr;q=0.9,en;q=0.8",
+})
+_http.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(total=2, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504)),
+))
+
+
+def _fetch_page_http(url, timeout=10):
+    """
+    Charge une page via HTTP simple (sans navigateur).
+    Retourne None si la page n'embarque pas le PRELOADED_STATE
+    (rendu JS ou challenge anti-bot) : il faut alors passer par Selenium.
+    """
+    try:
+        resp = _http.get(url, timeout=timeout)
+        resp.raise_for_status()
+    except Exception as e:
+        print(f"[scraper] HTTP indisponible pour {url}: {e}")
+        return None
 
-_driver = None
+    html = resp.text
+    if "PRELOADED_STATE" not in html:
+        return None
+    return html
 
 
-def _find_chromedriver():
-    """Cherche le chromedriver deja installe, sinon installe via manager."""
-    import os
-    import glob as globmod
+# ── Pool de drivers Chrome ──
+# Un driver par worker : les pages par sport sont chargees en parallele,
+# chacune dans son propre navigateur (demarre a la demande, garde d'un
+# refresh a l'autre).
 
-    # Chercher dans le cache webdriver-manager
-    wdm_dir = os.path.join(os.path.expanduser("~"), ".wdm", "drivers", "chromedriver")
-    if os.path.isdir(wdm_dir):
-        pattern = os.path.join(wdm_dir, "**", "chromedriver.exe")
-        found = globmod.glob(pattern, recursive=True)
-        if found:
-            # Prendre le plus recent
-            found.sort(key=os.path.getmtime, reverse=True)
-            print(f"[scraper] ChromeDriver cache trouve: {found[0]}")
-            return found[0]
+_driver_pool = queue.Queue()
+for _i in range(WINAMAX_WORKERS):
+    _driver_pool.put({"slot": _i, "driver": None})
 
-    # Pas de cache, on installe (lent mais necessaire la premiere fois)
-    print("[scraper] Telechargement ChromeDriver...")
-    from webdriver_manager.chrome import ChromeDriverManager
-    return ChromeDriverManager().install()
+# Ressources bloquees dans Chrome (motifs CDP Network.setBlockedURLs).
+# Seul le PRELOADED_STATE est lu : CSS inclus, contrairement a odds_api
+# qui lit innerText et depend donc du rendu.
+_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.css",
+]
 
 
-def _get_driver():
-    """Cree ou retourne le driver Chrome headless. Recrée si la session est morte."""
-    global _driver
-    if _driver is not None:
-        # Vérifier que la session est encore vivante
-        try:
-            _ = _driver.current_url  # lève une exception si la session est morte
-        except Exception:
-            print("[scraper] Session Chrome morte, recréation...")
-            try:
-                _driver.quit()
-            except Exception:
-                pass
-            _driver = None
-
+def _new_driver(slot):
+    """Demarre un Chrome headless pour le slot donne (None si echec)."""
     try:
         from selenium import webdriver
         from selenium.webdriver.chrome.service import Service
         from selenium.webdriver.chrome.options import Options
 
-        print("[scraper] Configuration Chrome...")
+        print(f"[scraper] Configuration Chrome #{slot}...")
 
         import tempfile, os as _os
         options = Options()
@@ -94,27 +143,39 @@ def _get_driver():
             "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
         )
         # Repertoire de profil unique pour eviter les conflits avec l'instance Oddsportal
-        _ud = _os.path.join(tempfile.gettempdir(), "ev_winamax_chrome")
+        _ud = _os.path.join(tempfile.gettempdir(), "ev_winamax_chrome" + (f"_{slot}" if slot else ""))
         options.add_argument(f"--user-data-dir={_ud}")
         options.add_experimental_option("excludeSwitches", ["enable-automation"])
         options.add_experimental_option("useAutomationExtension", False)
+        # Logos d'equipes inutiles : images desactivees des le profil
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+        })
 
-        chromedriver_path = _find_chromedriver()
+        chromedriver_path = get_chromedriver_path()
         print(f"[scraper] Lancement Chrome avec: {chromedriver_path}")
 
         service = Service(chromedriver_path)
-        _driver = webdriver.Chrome(service=service, options=options)
+        try:
+            driver = webdriver.Chrome(service=service, options=options)
+        except Exception:
+            # Chemin en cache perime (driver supprime / Chrome mis a jour) : re-resoudre
+            service = Service(get_chromedriver_path(force_refresh=True))
+            driver = webdriver.Chrome(service=service, options=options)
 
         # Masquer la detection Selenium
-        _driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
             "source": """
                 Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
                 window.chrome = {runtime: {}};
             """
         })
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": _BLOCKED_URLS})
 
-        print("[scraper] Chrome headless demarre")
-        return _driver
+        print(f"[scraper] Chrome headless #{slot} demarre")
+        return driver
 
     except Exception as e:
         import traceback
@@ -123,32 +184,105 @@ def _get_driver():
         return None
 
 
-def _fetch_page_selenium(url, wait_seconds=5):
-    """Charge une page avec Selenium et retourne le HTML complet."""
-    driver = _get_driver()
-    if not driver:
+def _quit_driver(driver):
+    """Ferme un driver sans propager d'erreur (session deja morte)."""
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+def _acquire_driver():
+    """
+    Emprunte un slot du pool (bloque si tous les drivers sont occupes).
+    Le driver est (re)cree si la session est morte. Retourne None si
+    Chrome ne peut pas demarrer.
+    """
+    slot = _driver_pool.get()
+    if slot["driver"] is not None:
+        try:
+            slot["driver"].current_url  # leve une exception si la session est morte
+        except Exception:
+            print(f"[scraper] Session Chrome #{slot['slot']} morte, recreation...")
+            _quit_driver(slot["driver"])
+            slot["driver"] = None
+
+    if slot["driver"] is None:
+        slot["driver"] = _new_driver(slot["slot"])
+        if slot["driver"] is None:
+            _driver_pool.put(slot)
+            return None
+    return slot
+
+
+def _release_driver(slot):
+    """Rend au pool un slot obtenu via _acquire_driver()."""
+    if slot is not None:
+        _driver_pool.put(slot)
+
+
+# Serialise cote Chrome : seul l'etat transite par WebDriver, pas tout le DOM
+_STATE_JS = "return JSON.stringify(window.PRELOADED_STATE || null);"
+_STATE_READY_JS = "return !!window.PRELOADED_STATE;"
+
+
+def _wait_state(driver, timeout):
+    """
+    Attend que la page expose PRELOADED_STATE (au plus timeout secondes,
+    l'ancienne duree du sleep fixe : le pire cas est inchange).
+    """
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.25).until(
+            lambda d: d.execute_script(_STATE_READY_JS)
+        )
+    except Exception:
+        pass  # timeout : l'etat est lu tel quel (repli page_source dans _read_state)
+
+
+def _read_state(driver):
+    """
+    Lit window.PRELOADED_STATE dans la page chargee.
+    Repli sur page_source + regex si la variable n'est pas exposee sur window.
+    """
+    raw = driver.execute_script(_STATE_JS)
+    state = orjson.loads(raw) if raw else None
+    if state:
+        return state
+    return _extract_preloaded_state(driver.page_source)
+
+
+def _fetch_state_selenium(url, wait_seconds=5):
+    """Charge une page avec Selenium et retourne son PRELOADED_STATE (None si absent)."""
+    slot = _acquire_driver()
+    if not slot:
         return None
 
     try:
+        driver = slot["driver"]
         driver.get(url)
-        time.sleep(wait_seconds)
-        html = driver.page_source
-        print(f"[scraper] Page chargee: {len(html)} chars")
-        return html
+        _wait_state(driver, wait_seconds)
+        state = _read_state(driver)
+        print(f"[scraper] Page chargee: {url} ({'etat trouve' if state else 'sans etat'})")
+        return state
     except Exception as e:
         print(f"[scraper] Erreur Selenium pour {url}: {e}")
         return None
+    finally:
+        _release_driver(slot)
 
 
 def _scroll_and_collect(url, scroll_pause=2, max_scrolls=5):
-    """Charge une page, scrolle pour le contenu dynamique."""
-    driver = _get_driver()
-    if not driver:
+    """Charge une page, scrolle pour le contenu dynamique, puis retourne son PRELOADED_STATE."""
+    slot = _acquire_driver()
+    if not slot:
         return None
 
     try:
+        driver = slot["driver"]
         driver.get(url)
-        time.sleep(3)
+        _wait_state(driver, 3)
 
         last_height = driver.execute_script("return document.body.scrollHeight")
         for i in range(max_scrolls):
@@ -159,43 +293,45 @@ def _scroll_and_collect(url, scroll_pause=2, max_scrolls=5):
                 break
             last_height = new_height
 
-        return driver.page_source
+        return _read_state(driver)
     except Exception as e:
         print(f"[scraper] Erreur scroll {url}: {e}")
         return None
+    finally:
+        _release_driver(slot)
+
+
+def _fetch_state(url, wait_seconds=4):
+    """PRELOADED_STATE d'une page Winamax : HTTP simple d'abord, Selenium sinon."""
+    return (_extract_preloaded_state(_fetch_page_http(url))
+            or _fetch_state_selenium(url, wait_seconds=wait_seconds))
 
 
 # ── Extraction des donnees ──
 
 def _extract_preloaded_state(html):
-    """Extrait le JSON PRELOADED_STATE depuis le HTML."""
+    """
+    Extrait le JSON PRELOADED_STATE depuis le HTML.
+    raw_decode lit l'objet a partir de son "{" et s'arrete a l'accolade
+    fermante correspondante (chaines et echappements compris) : une seule
+    passe, sans regex pour trouver la fin du bloc.
+    """
     if not html:
         return None
 
-    # Pattern principal
-    pattern = r'var\s+PRELOADED_STATE\s*=\s*(\{.*?\})\s*;\s*var\s+BETTING_CONFIGURATION'
-    match = re.search(pattern, html, re.DOTALL)
-    if match:
+    for match in _RE_PRELOADED_START.finditer(html):
         try:
-            return json.loads(match.group(1))
-        except json.JSONDecodeError as e:
+            return _JSON_DECODER.raw_decode(html, match.end())[0]
+        except ValueError as e:
             print(f"[scraper] Erreur JSON PRELOADED_STATE: {e}")
-
-    # Pattern alternatif
-    pattern2 = r'PRELOADED_STATE\s*=\s*(\{.+?\})\s*;'
-    match2 = re.search(pattern2, html, re.DOTALL)
-    if match2:
-        try:
-            return json.loads(match2.group(1))
-        except json.JSONDecodeError:
-            pass
-
     return None
 
 
-def _parse_state_data(state, sport_filter=None):
+def _parse_state_data(state, sport_filter=None, by_sport=None):
     """
     Parse le PRELOADED_STATE Winamax.
+    Si by_sport (dict) est fourni, chaque evenement y est aussi range sous
+    sa cle sport_api_key au moment ou il est produit.
 
     Structure reelle confirmee :
     - state["sports"]    : {id: {sportName, categories, ...}}
@@ -209,12 +345,25 @@ def _parse_state_data(state, sport_filter=None):
 
     matches = state.get("matches", {})
     bets = state.get("bets", {})
-    outcomes_map = state.get("outcomes", {})
-    odds_map = state.get("odds", {})  # Les cotes sont ICI, pas dans outcomes!
+    # Cles normalisees en str une fois : une seule recherche par outcome
+    outcomes_map = {str(k): v for k, v in state.get("outcomes", {}).items()}
+    odds_map = {str(k): v for k, v in state.get("odds", {}).items()}  # Les cotes sont ICI, pas dans outcomes!
     sports = state.get("sports", {})
 
+    # Index matchId -> [(bet_id, bet)] construit en une passe : evite de
+    # parcourir tous les paris pour chaque match (ordre des paris conserve)
+    bets_by_match = {}
+    for bet_id, bet in bets.items():
+        if not bet or not isinstance(bet, dict):
+            continue
+        bets_by_match.setdefault(str(bet.get("matchId", "")), []).append((bet_id, bet))
+
     events = []
     now = int(time.time())
+    # Methodes liees une fois : evite la resolution d'attribut a chaque outcome
+    get_bets = bets_by_match.get
+    get_outcome = outcomes_map.get
+    get_odds = odds_map.get
 
     for match_id, match in matches.items():
         match_start = match.get("matchStart", match.get("startDate", 0))
@@ -262,38 +411,35 @@ def _parse_state_data(state, sport_filter=None):
             parts = title.split(" - ", 1)
             home, away = parts[0].strip(), parts[1].strip()
         elif " vs " in title.lower():
-            parts = re.split(r'\s+vs\.?\s+', title, flags=re.IGNORECASE)
+            parts = _RE_VS.split(title)
             home = parts[0].strip()
             away = parts[1].strip() if len(parts) > 1 else ""
 
         # Recuperer les paris pour ce match
         match_bets = []
-        for bet_id, bet in bets.items():
-            if not bet or not isinstance(bet, dict):
-                continue
-            if str(bet.get("matchId", "")) != str(match_id):
-                continue
-
+        for bet_id, bet in get_bets(str(match_id), ()):
             # Les outcomes sont references par ID dans bet["outcomes"]
             outcome_ids = bet.get("outcomes", [])
             bet_outcomes = []
 
             for out_id in outcome_ids:
                 out_id_str = str(out_id)
-                outcome = outcomes_map.get(out_id_str) or outcomes_map.get(out_id)
+                outcome = get_outcome(out_id_str)
                 if not outcome or not isinstance(outcome, dict):
                     continue
 
                 # Les cotes sont dans le dict odds_map, pas dans outcome
-                odds_value = odds_map.get(out_id_str) or odds_map.get(out_id, 0)
+                odds_value = get_odds(out_id_str, 0)
 
-                if isinstance(odds_value, str):
+                # Cas courant (float) teste en premier ; converti une seule fois
+                t = type(odds_value)
+                if t is not float:
+                    if t is not int and t is not str:
+                        continue
                     try:
                         odds_value = float(odds_value)
                     except ValueError:
                         continue
-                elif not isinstance(odds_value, (int, float)):
-                    continue
 
                 # Winamax stocke parfois en centiemes (195 = 1.95)
                 if odds_value > 100:
@@ -305,7 +451,7 @@ def _parse_state_data(state, sport_filter=None):
                 label = outcome.get("label", outcome.get("name", "?"))
                 bet_outcomes.append({
                     "name": label,
-                    "odds": round(float(odds_value), 2),
+                    "odds": round(odds_value, 2),
                 })
 
             if len(bet_outcomes) >= 2:
@@ -327,9 +473,13 @@ def _parse_state_data(state, sport_filter=None):
 
         # Ajouter chaque marche comme evenement
         if match_bets:
+            sport_bucket = None
+            if by_sport is not None and sport_api_key:
+                sport_bucket = by_sport.setdefault(sport_api_key, [])
+
             for bet_data in match_bets:
                 mtype, mthreshold = _detect_market_type(bet_data["outcomes"])
-                events.append({
+                event = {
                     "match_id": str(match_id),
                     "sport": sport_name,
                     "sport_api_key": sport_api_key,
@@ -342,7 +492,10 @@ def _parse_state_data(state, sport_filter=None):
                     "market_threshold": mthreshold,
                     "outcomes": bet_data["outcomes"],
                     "start_time": match_start,
-                })
+                }
+                events.append(event)
+                if sport_bucket is not None:
+                    sport_bucket.append(event)
 
     return events
 
@@ -360,19 +513,17 @@ def _detect_market_type(outcomes):
     if not outcomes:
         return "unknown", None
 
-    labels = [o.get("name", "").lower() for o in outcomes]
-    joined = " ".join(labels)
+    # Un seul lower() sur la chaine jointe plutot qu'un par label
+    joined = " ".join([o.get("name", "") for o in outcomes]).lower()
 
-    # Over/Under : "plus de 2.5", "moins de 2.5", "over 2.5", "under 1.5"
-    ou_keywords = ["plus de", "moins de", "over", "under", "+2.", "+1.", "+3.", "-2.", "-1.", "-3."]
-    if any(kw in joined for kw in ou_keywords):
-        m = re.search(r'(\d+[.,]\d+)', joined)
+    # Over/Under (prioritaire sur BTTS)
+    if _RE_OU_KW.search(joined):
+        m = _RE_OU_NUM.search(joined)
         threshold = float(m.group(1).replace(',', '.')) if m else 2.5
         return "over_under", threshold
 
-    # BTTS : "les deux equipes marquent", "both teams to score"
-    btts_keywords = ["deux equipes", "both teams", "btts", "les 2 equipes", "marquent"]
-    if any(kw in joined for kw in btts_keywords):
+    # BTTS
+    if _RE_BTTS_KW.search(joined):
         return "btts", None
 
     # 1X2 classique (3 outcomes : domicile / nul / exterieur)
@@ -398,7 +549,7 @@ def _get_winamax_odds_via_api():
     events = []
 
     try:
-        resp = requests.get(
+        resp = _http.get(
             f"{ODDS_API_BASE}/sports",
             params={"apiKey": ODDS_API_KEY},
             timeout=15,
@@ -412,7 +563,7 @@ def _get_winamax_odds_via_api():
     for sport in api_sports:
         sport_key = sport["key"]
         try:
-            resp = requests.get(
+            resp = _http.get(
                 f"{ODDS_API_BASE}/sports/{sport_key}/odds",
                 params={
                     "apiKey": ODDS_API_KEY,
@@ -480,36 +631,58 @@ def get_sports():
     ]
 
 
+def _group_by_sport(events):
+    """Range des evenements par sport_api_key (ignore ceux sans cle)."""
+    by_sport = {}
+    for ev in events:
+        key = ev.get("sport_api_key", "")
+        if key:
+            by_sport.setdefault(key, []).append(ev)
+    return by_sport
+
+
+def _fetch_sport_state(sport_id):
+    """Charge la page d'un sport (HTTP puis Selenium) et en extrait le PRELOADED_STATE."""
+    url = f"https://www.winamax.fr/paris-sportifs/sports/{sport_id}"
+    return _fetch_state(url)
+
+
 def get_all_events():
     """
     Recupere les evenements Winamax.
     1. Selenium (Chrome headless) pour scraper winamax.fr
     2. Fallback The Odds API si Chrome echoue
+
+    Returns:
+        (events, events_by_sport) : liste plate + meme evenements ranges
+        par sport_api_key, construits pendant le parsing.
     """
     print("[scraper] Demarrage Selenium...")
-    html = _scroll_and_collect(
+    state = _scroll_and_collect(
         "https://www.winamax.fr/paris-sportifs/sports",
         scroll_pause=2,
         max_scrolls=3,
     )
 
     # Essayer PRELOADED_STATE
-    state = _extract_preloaded_state(html)
     if state:
-        events = _parse_state_data(state)
+        by_sport = {}
+        events = _parse_state_data(state, by_sport=by_sport)
         if events:
             print(f"[scraper] {len(events)} evenements (Selenium)")
-            return events
+            return events, by_sport
 
-    # Tentative par sport
+    # Tentative par sport : pages chargees en parallele sur le pool de drivers,
+    # parsing dans l'ordre des sports
     print("[scraper] Tentative par sport individuel...")
     all_events = []
-    for sport_id in WINAMAX_SPORTS:
-        url = f"https://www.winamax.fr/paris-sportifs/sports/{sport_id}"
-        html = _fetch_page_selenium(url, wait_seconds=4)
-        state = _extract_preloaded_state(html)
-        if state:
-            evts = _parse_state_data(state, sport_filter=sport_id)
+    by_sport = {}
+    with ThreadPoolExecutor(max_workers=WINAMAX_WORKERS) as pool:
+        states = pool.map(_fetch_sport_state, WINAMAX_SPORTS)
+        for sport_id, state in zip(WINAMAX_SPORTS, states):
+            if not state:
+                continue
+            evts = _parse_state_data(state, sport_filter=sport_id, by_sport=by_sport)
             if evts:
                 sport_name = WINAMAX_SPORTS[sport_id][0]
                 print(f"[scraper] {sport_name}: {len(evts)} evenements")
@@ -517,17 +690,18 @@ def get_all_events():
 
     if all_events:
         print(f"[scraper] {len(all_events)} evenements total")
-        return all_events
+        return all_events, by_sport
 
     # Fallback The Odds API
     print("[scraper] Selenium n'a pas trouve de donnees, fallback API...")
-    return _get_winamax_odds_via_api()
+    events = _get_winamax_odds_via_api()
+    return events, _group_by_sport(events)
 
 
 def get_match_result(match_id, home="", away="", start_time=0, sport="Football"):
     """
     Recupere le resultat d'un match termine.
-    1. Essaie Winamax (Selenium + PRELOADED_STATE)
+    1. Essaie Winamax (HTTP puis Selenium + PRELOADED_STATE)
     2. Fallback ESPN API (sans auth, gratuit)
 
     Returns:
@@ -553,8 +727,7 @@ def get_match_result(match_id, home="", away="", start_time=0, sport="Football")
 def _get_result_winamax(match_id):
     """Cherche le resultat sur la page Winamax du match."""
     url = f"https://www.winamax.fr/paris-sportifs/match/{match_id}"
-    html = _fetch_page_selenium(url, wait_seconds=4)
-    state = _extract_preloaded_state(html)
+    state = _fetch_state(url)
 
     if not state:
         return None
@@ -732,102 +905,214 @@ _TEAM_TRANSLATIONS = {
 }
 
 
-def _normalize_team(name):
-    """Normalise un nom d'equipe pour la comparaison."""
-    import unicodedata
+def _normalize_team_raw(name):
+    """Minuscules, sans accents ni prefixes de club (sans traduction)."""
     name = name.lower().strip()
     name = unicodedata.normalize("NFD", name)
     name = "".join(c for c in name if unicodedata.category(c) != "Mn")
-    for word in ["fc", "ac", "as", "sc", "us", "ss", "rc", "og", "afc", "cf", "cd"]:
-        name = re.sub(r'\b' + word + r'\b', '', name)
-    name = re.sub(r'\s+', ' ', name).strip()
-    return _TEAM_TRANSLATIONS.get(name, name)
+    name = _RE_CLUB_PREFIX.sub('', name)
+    return _RE_SPACES.sub(' ', name).strip()
+
+
+# _TEAM_TRANSLATIONS avec des cles deja normalisees : les cles accentuees ou
+# prefixees ("gérone", "as rome") etaient inatteignables apres normalisation.
+# En cas de collision, la premiere entree gagne.
+_TEAM_TRANSLATIONS_N = {}
+for _k, _v in _TEAM_TRANSLATIONS.items():
+    _TEAM_TRANSLATIONS_N.setdefault(_normalize_team_raw(_k), _v)
 
 
-def _teams_match(name1, name2):
-    """Verifie si deux noms d'equipe correspondent (fuzzy)."""
-    from difflib import SequenceMatcher
-    n1, n2 = _normalize_team(name1), _normalize_team(name2)
+@functools.lru_cache(maxsize=4096)
+def _normalize_team(name):
+    """Normalise un nom d'equipe pour la comparaison (memoise : memes noms compares a chaque league)."""
+    name = _normalize_team_raw(name)
+    return _TEAM_TRANSLATIONS_N.get(name, name)
+
+
+@functools.lru_cache(maxsize=8192)
+def _teams_match_pre(n1, n2):
+    """Verifie si deux noms d'equipe deja normalises (_normalize_team) correspondent (fuzzy)."""
     if n1 == n2:
         return True
     if n1 in n2 or n2 in n1:
         return True
-    ratio = SequenceMatcher(None, n1, n2).ratio()
-    return ratio >= 0.65
+    return fuzz.ratio(n1, n2) >= 65
 
 
-def _get_result_espn(home, away, start_time, sport):
+ESPN_WORKERS = 8  # leagues ESPN interrogees en parallele
+
+# Cache disque des scoreboards ESPN, un fichier par (league, date) : une
+# serie de recherches de resultats sur la meme journee ne refait pas les requetes
+ESPN_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ev-finder", "espn")
+ESPN_CACHE_TTL = 3600  # scoreboard dont tous les matchs sont termines
+ESPN_CACHE_TTL_OPEN = 300  # scoreboard avec des matchs a venir / en cours
+_espn_last_sweep = 0.0
+
+
+def _sweep_espn_cache(now):
+    """Supprime les scoreboards expires (au plus une passe par ESPN_CACHE_TTL_OPEN)."""
+    global _espn_last_sweep
+    if now - _espn_last_sweep < ESPN_CACHE_TTL_OPEN:
+        return
+    _espn_last_sweep = now
+    try:
+        entries = list(os.scandir(ESPN_CACHE_DIR))
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if now - entry.stat().st_mtime >= ESPN_CACHE_TTL:
+                os.remove(entry.path)
+        except OSError:
+            pass  # deja supprime par un autre thread
+
+
+def _espn_all_completed(data):
     """
-    Cherche le score via ESPN unofficial API.
-    Essaie plusieurs leagues jusqu'a trouver le match.
+    Vrai si le scoreboard a des matchs et qu'ils sont tous termines (plus rien
+    ne changera). Un scoreboard vide peut encore se remplir : il garde le TTL court.
     """
-    import urllib.request as ur
-    import datetime
+    events = data.get("events", [])
+    return bool(events) and all(
+        event.get("competitions", [{}])[0].get("status", {}).get("type", {}).get("completed", False)
+        for event in events
+    )
 
-    date_str = datetime.datetime.utcfromtimestamp(start_time).strftime("%Y%m%d")
-    leagues = _ESPN_LEAGUES.get(sport, _ESPN_LEAGUES.get("Football", []))
 
-    for league in leagues:
-        url = f"https://site.api.espn.com/apis/site/v2/sports/soccer/{league}/scoreboard?dates={date_str}"
+def _espn_scoreboard(league, date_str):
+    """
+    Scoreboard ESPN d'une league pour une date YYYYMMDD (None si indisponible),
+    servi depuis ESPN_CACHE_DIR s'il est assez recent.
+    """
+    path = os.path.join(ESPN_CACHE_DIR, f"{league}_{date_str}.json")
+    try:
+        age = time.time() - os.path.getmtime(path)
+        if age < ESPN_CACHE_TTL:
+            with open(path, "rb") as f:
+                data = orjson.loads(f.read())
+            if age < ESPN_CACHE_TTL_OPEN or _espn_all_completed(data):
+                return data
+    except (OSError, ValueError):
+        pass
+
+    data = _fetch_espn_scoreboard(league, date_str)
+    if data is not None:
         try:
-            req = ur.Request(url, headers={"User-Agent": "Mozilla/5.0"})
-            resp = ur.urlopen(req, timeout=6)
-            data = json.loads(resp.read())
-        except Exception:
+            os.makedirs(ESPN_CACHE_DIR, exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(orjson.dumps(data))
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[scraper] Cache ESPN non ecrit ({league} {date_str}): {e}")
+        _sweep_espn_cache(time.time())
+    return data
+
+
+def _fetch_espn_scoreboard(league, date_str):
+    """Requete du scoreboard ESPN d'une league pour une date YYYYMMDD (None si indisponible)."""
+    url = f"https://site.api.espn.com/apis/site/v2/sports/soccer/{league}/scoreboard?dates={date_str}"
+    try:
+        resp = _http.get(url, timeout=6)
+        resp.raise_for_status()
+        return orjson.loads(resp.content)
+    except Exception:
+        return None
+
+
+def _find_espn_competition(data, n_home, n_away):
+    """
+    Retourne la competition ESPN du match (dans les deux sens), ou None.
+    n_home / n_away : noms deja passes par _normalize_team.
+    """
+    for event in data.get("events", []):
+        comp = event.get("competitions", [{}])[0]
+        competitors = comp.get("competitors", [])
+        if len(competitors) < 2:
             continue
 
-        for event in data.get("events", []):
-            comp = event.get("competitions", [{}])[0]
-            competitors = comp.get("competitors", [])
-            if len(competitors) < 2:
-                continue
+        # Noms ESPN normalises une fois par evenement
+        n_eh = _normalize_team(competitors[0].get("team", {}).get("displayName", ""))
+        n_ea = _normalize_team(competitors[1].get("team", {}).get("displayName", ""))
 
-            espn_home = competitors[0].get("team", {}).get("displayName", "")
-            espn_away = competitors[1].get("team", {}).get("displayName", "")
+        # Matcher les equipes (dans les deux sens)
+        home_ok = _teams_match_pre(n_home, n_eh) or _teams_match_pre(n_home, n_ea)
+        away_ok = _teams_match_pre(n_away, n_eh) or _teams_match_pre(n_away, n_ea)
+        if home_ok and away_ok:
+            return comp
+    return None
 
-            # Matcher les equipes (dans les deux sens)
-            home_ok = _teams_match(home, espn_home) or _teams_match(home, espn_away)
-            away_ok = _teams_match(away, espn_home) or _teams_match(away, espn_away)
-            if not (home_ok and away_ok):
-                continue
 
-            status = comp.get("status", {})
-            if not status.get("type", {}).get("completed", False):
-                state_str = status.get("type", {}).get("state", "")
-                if state_str == "in":
-                    return {"match_id": "", "status": "live", "score": "", "winning_outcomes": [], "home": home, "away": away}
-                return None
-
-            # Match fini
-            # ESPN: competitors[0] = home, competitors[1] = away
-            # mais l'ordre peut etre inverse si Winamax a home/away dans l'autre sens
-            scores = {c["team"]["displayName"]: int(c.get("score", 0)) for c in competitors}
-            home_key = next((k for k in scores if _teams_match(home, k)), None)
-            away_key = next((k for k in scores if _teams_match(away, k)), None)
-
-            if home_key and away_key:
-                hs, as_ = scores[home_key], scores[away_key]
-            else:
-                hs = int(competitors[0].get("score", 0))
-                as_ = int(competitors[1].get("score", 0))
-                home_key, away_key = espn_home, espn_away
+def _espn_result(comp, home, away, n_home, n_away):
+    """Construit le resultat (live / finished, None si pas commence) d'une competition ESPN."""
+    competitors = comp["competitors"]
+    status = comp.get("status", {})
+    if not status.get("type", {}).get("completed", False):
+        state_str = status.get("type", {}).get("state", "")
+        if state_str == "in":
+            return {"match_id": "", "status": "live", "score": "", "winning_outcomes": [], "home": home, "away": away}
+        return None
 
-            score_str = f"{hs}-{as_}"
-            if hs > as_:
-                winning_outcomes = [home]
-            elif as_ > hs:
-                winning_outcomes = [away]
-            else:
-                winning_outcomes = ["Draw", "Match nul", "Nul", "X"]
+    # Match fini
+    # ESPN: competitors[0] = home, competitors[1] = away
+    # mais l'ordre peut etre inverse si Winamax a home/away dans l'autre sens
+    # Une passe : le premier competiteur correspondant a chaque equipe donne son score
+    hs = as_ = None
+    for c in competitors:
+        n_name = _normalize_team(c["team"]["displayName"])
+        if hs is None and _teams_match_pre(n_home, n_name):
+            hs = int(c.get("score", 0))
+        if as_ is None and _teams_match_pre(n_away, n_name):
+            as_ = int(c.get("score", 0))
+
+    if hs is None or as_ is None:
+        hs = int(competitors[0].get("score", 0))
+        as_ = int(competitors[1].get("score", 0))
+
+    score_str = f"{hs}-{as_}"
+    if hs > as_:
+        winning_outcomes = [home]
+    elif as_ > hs:
+        winning_outcomes = [away]
+    else:
+        winning_outcomes = ["Draw", "Match nul", "Nul", "X"]
+
+    return {
+        "match_id": "",
+        "status": "finished",
+        "score": score_str,
+        "winning_outcomes": winning_outcomes,
+        "home": home,
+        "away": away,
+    }
 
-            return {
-                "match_id": "",
-                "status": "finished",
-                "score": score_str,
-                "winning_outcomes": winning_outcomes,
-                "home": home,
-                "away": away,
-            }
+
+def _get_result_espn(home, away, start_time, sport):
+    """
+    Cherche le score via ESPN unofficial API.
+    Les scoreboards de toutes les leagues sont demandes en parallele ; la
+    premiere league (dans l'ordre de _ESPN_LEAGUES) contenant le match gagne.
+    """
+    import datetime
+
+    date_str = datetime.datetime.utcfromtimestamp(start_time).strftime("%Y%m%d")
+    leagues = _ESPN_LEAGUES.get(sport, _ESPN_LEAGUES.get("Football", []))
+    if not leagues:
+        return None
+    n_home, n_away = _normalize_team(home), _normalize_team(away)
+
+    pool = ThreadPoolExecutor(max_workers=min(ESPN_WORKERS, len(leagues)))
+    try:
+        scoreboards = pool.map(lambda league: _espn_scoreboard(league, date_str), leagues)
+        for data in scoreboards:
+            if not data:
+                continue
+            comp = _find_espn_competition(data, n_home, n_away)
+            if comp is not None:
+                return _espn_result(comp, home, away, n_home, n_away)
+    finally:
+        # Match trouve : les requetes pas encore parties sont annulees
+        pool.shutdown(wait=False, cancel_futures=True)
 
     return None
 
@@ -844,11 +1129,8 @@ def get_match_results_batch(match_ids):
     remaining = set(str(mid) for mid in match_ids)
 
     # Essayer la page sports principale d'abord
-    html = _fetch_page_selenium(
-        "https://www.winamax.fr/paris-sportifs/sports",
-        wait_seconds=4,
-    )
-    state = _extract_preloaded_state(html)
+    url = "https://www.winamax.fr/paris-sportifs/sports"
+    state = _fetch_state(url)
 
     if state:
         matches_data = state.get("matches", {})
@@ -874,11 +1156,13 @@ def get_match_results_batch(match_ids):
 
 
 def cleanup():
-    """Ferme le driver Chrome proprement."""
-    global _driver
-    if _driver:
+    """Ferme les drivers Chrome inactifs du pool."""
+    for _ in range(_driver_pool.qsize()):
         try:
-            _driver.quit()
-        except Exception:
-            pass
-        _driver = None
+            slot = _driver_pool.get_nowait()
+        except queue.Empty:
+            break
+        if slot["driver"] is not None:
+            _quit_driver(slot["driver"])
+        slot["driver"] = None
+        _driver_pool.put(slot)